@@ -0,0 +1,402 @@
+# C02 Sensor in CircuitPython
+# Copy this file to the CIRCUITPY drive next to code.py, which runs it
+#
+# Works with either an Adafruit SCD40 C02 Sensor or an Adafruit SGP 30
+# STEMMA-QT Sensor, an Adafruit QT PY ESP32-S3 or ESP32-S2 Reverse TFT
+# Feather, and an Adafruit 1.44" Color TFT LCD Display ST7735R display
+#
+# The sensor is found on the STEMMA QT connector at boot and only its
+# driver is imported, see sensor_scd4x.py and sensor_sgp30.py.
+
+import board, time, gc
+import asyncio
+import displayio, terminalio, keypad
+from adafruit_st7735r import ST7735R
+from displayio import FourWire
+from adafruit_display_text import label
+from adafruit_bitmap_font import bitmap_font
+from chart import TrendChart
+from render import Renderer
+from digits import DigitDisplay, DIGITS
+from ticker import Ticker
+from boot_timeline import timeline
+
+# Time each boot phase, see boot_timeline.py. code.py marks "start" before
+# importing this, so "imports" shows how long compiling or loading it took.
+timeline.mark("imports")
+gc.collect()
+import_heap = gc.mem_free()
+
+# Sensor Constants
+# I2C addresses the sensors are found at
+SCD4X_ADDRESS = 0x62
+SGP30_ADDRESS = 0x58
+STATS_INTERVAL = 600  # How often to print timing stats
+
+# Display Constants
+WIDTH = 128
+HEIGHT = 128
+HORIZONTAL_START = 8
+VERTICAL_MOVE = 8
+CO2_VAL_VERTICAL = 37
+CO2_DIGITS = 5  # Most digits the CO2 value can show
+ICON_VERTICAL = 89
+
+# Color Constants
+COLOR_BLACK = 0x000000
+COLOR_WHITE = 0xFFFFFF
+COLOR_GREEN = 0x00FF00
+COLOR_RED = 0xFF0000
+
+# Trend Chart Constants (press the BOOT button to switch views)
+CHART_TOP = 24
+CHART_LOW = 400  # ppm at the bottom of the chart
+CHART_HIGH = 2000  # ppm at the top of the chart
+COLOR_GRAY = 0x808080
+BUTTON_INTERVAL = 0.05  # How often to check the button
+FRAME_BUDGET = 0.05  # How long a display refresh should take (seconds)
+
+# Logging Constants
+# Readings are logged to the display breakout's microSD card, see sdlog.py
+LOG_TO_SD = True
+SD_CS = board.A1  # Wire the breakout's SDCS pin here
+SD_PATH = "/sd"
+
+# Font Loading Constants
+# Glyphs are loaded a few at a time while the sensor warms up
+FONT_SLICE_SIZE = 2  # Glyphs loaded per slice
+ICON_GLYPHS = "\uf118\uf119"  # Smile and frown faces
+FALLBACK_FACES = (":)", ":(")  # Drawn with terminalio.FONT if the fonts won't load
+
+# Animation Constants
+LOADING_INTERVAL = 0.05  # How fast the animation updates (in seconds)
+SPINNER_CHARS = ['|', '/', '-', '\\']  # For spinning animation
+
+def scan_i2c(i2c):
+    """Addresses of everything on the I2C bus"""
+    while not i2c.try_lock():
+        pass
+    try:
+        return i2c.scan()
+    finally:
+        i2c.unlock()
+
+# Find the CO2 sensor. An SCD4x next to an SGP30 is used for the SGP30's
+# humidity compensation, so the SGP30 wins if both are there.
+i2c = board.STEMMA_I2C()  # For using the built-in STEMMA QT connector on a microcontroller
+addresses = scan_i2c(i2c)
+if SGP30_ADDRESS in addresses:
+    import sensor_sgp30 as sensor
+elif SCD4X_ADDRESS in addresses:
+    import sensor_scd4x as sensor
+else:
+    raise RuntimeError("No SCD4x or SGP30 found on the STEMMA QT connector")
+sensor.setup(i2c, addresses)
+timeline.mark("sensor")
+print("Waiting for first measurement....")
+
+# Setup Display
+# Release any resources currently in use for the displays
+displayio.release_displays()
+
+spi = board.SPI()
+tft_cs = board.TX
+tft_dc = board.RX
+
+# The card shares the display's SPI bus. Set it up first, while nothing else
+# is using the bus. Readings are logged to a file named after the sensor.
+# sdlog.py and delta.py are only needed for logging, so they're only
+# imported if it's on.
+logger = None
+if LOG_TO_SD:
+    try:
+        from sdlog import BlockLog, mount_sd
+        if mount_sd(spi, SD_CS, SD_PATH):
+            logger = BlockLog(f"{SD_PATH}/{sensor.LOG_NAME}.log", sensor.LOG_FIELDS)
+    except ImportError as e:
+        print(f"sdlog.py or delta.py is missing, so readings won't be logged: {e}")
+# Readings also go out on the USB data port, if boot.py turned it on and
+# telemetry.py is on the board
+try:
+    from telemetry import Telemetry
+    telemetry = Telemetry(sensor.LOG_FIELDS)
+except ImportError:
+    telemetry = None
+
+display_bus = FourWire(spi, command=tft_dc, chip_select=tft_cs, reset=board.D9)
+display = ST7735R(display_bus, width=128, height=128, colstart=2, rowstart=1)
+# Changes are drawn in batches, each with one refresh. See render.py
+renderer = Renderer(display, FRAME_BUDGET)
+timeline.mark("display")
+
+# Dictionary that holds previous values. Values accessed ex: last_value["co2"]
+prev_values = {
+    "co2": None,
+    "is_high": None
+}
+
+def load_font(path):
+    """Load the subsetted .pcf version of a .bdf font if it's on the board.
+
+    tools/subset_fonts.py makes the .pcf files, which load much faster.
+    """
+    try:
+        return bitmap_font.load_font(path[:-4] + ".pcf")
+    except OSError:
+        return bitmap_font.load_font(path)
+
+# Create base display group
+main_group = displayio.Group()
+
+# Create single background with palette
+color_bitmap = displayio.Bitmap(WIDTH, HEIGHT, 1)
+color_palette = displayio.Palette(1)
+color_palette[0] = 0x000000  # Start with black background
+bg_tile = displayio.TileGrid(color_bitmap, pixel_shader=color_palette, x=0, y=0)
+
+# Create the terminalio labels now: the CO2 status, then the sensor's own
+# labels. The CO2 value and icon are added by font_task() once their fonts
+# have loaded.
+co2_label = label.Label(
+    terminalio.FONT, scale=2, color=0xFFFFFF,
+    x=HORIZONTAL_START, y=5+VERTICAL_MOVE)
+labels = {}
+for name, x, y, scale in sensor.LABELS:
+    labels[name] = label.Label(
+        terminalio.FONT, scale=scale, color=0xFFFFFF,
+        x=x, y=y+VERTICAL_MOVE)
+co2_value = None
+icon_label = None
+faces = ICON_GLYPHS  # Good and high, in icon_label's font
+fonts_ready = asyncio.Event()
+
+# Add all elements to main group
+main_group.append(bg_tile)
+main_group.append(co2_label)
+for label_obj in labels.values():
+    main_group.append(label_obj)
+
+# Create the trend chart view, one column per reading
+co2_chart = TrendChart(
+    WIDTH, HEIGHT - CHART_TOP, CHART_LOW, CHART_HIGH, sensor.CO2_THRESHOLD,
+    (COLOR_BLACK, COLOR_GREEN, COLOR_RED, COLOR_GRAY), y=CHART_TOP)
+chart_title = label.Label(
+    terminalio.FONT, scale=1, color=COLOR_WHITE,
+    x=2, y=6, text=f"CO2 last {WIDTH * sensor.reading_interval // 60} min")
+chart_range = label.Label(
+    terminalio.FONT, scale=1, color=COLOR_WHITE,
+    x=2, y=17, text=f"{CHART_LOW}-{CHART_HIGH}ppm")
+chart_group = displayio.Group()
+for item in [chart_title, chart_range, co2_chart.tile_grid]:
+    chart_group.append(item)
+
+# Show the display group
+display.root_group = main_group
+
+def update_spinner_animation(frame):
+    """Rotating line animation."""
+    co2_label.text = f"Loading {SPINNER_CHARS[frame]}"
+    sensor.spin(labels, SPINNER_CHARS[frame])
+
+def show_loading_screen():
+    """Display loading message while sensor initializes."""
+    co2_label.text = "Loading..."
+    sensor.show_loading(labels)
+
+# Show loading screen
+with renderer:
+    show_loading_screen()
+timeline.mark("loading_screen")
+
+def update_labels(co2, is_high):
+    # Update only the labels that have changed.
+    if prev_values["is_high"] != is_high:
+        # Update background color by changing the palette
+        color_palette[0] = 0xFFFFFF if is_high else 0x000000
+        new_color = 0x000000 if is_high else 0xFFFFFF
+
+        co2_label.color = new_color
+        co2_value.color = new_color
+        for label_obj in labels.values():
+            label_obj.color = new_color
+
+        # Update icon
+        icon_label.text = faces[is_high]
+        icon_label.color = 0x00FF00 if not is_high else 0xFF0000
+
+    # Update text only if values have changed
+    if prev_values["co2"] != co2:
+        co2_label.text = f"CO2: {"HIGH" if is_high else "good"}"
+        if isinstance(co2_value, DigitDisplay):
+            co2_value.show(co2)
+        else:
+            co2_value.text = str(co2)
+
+    # Then the sensor's own readings
+    sensor.update_labels(labels)
+
+    # Store new values
+    prev_values.update({
+        "co2": co2,
+        "is_high": is_high
+    })
+
+async def font_task():
+    """Load the fonts a slice at a time, then add the labels that use them.
+
+    The loading screen only uses terminalio.FONT, so it shows right away.
+    Each slice of glyphs loads in between the other tasks' work during the
+    sensor warmup, so every glyph a reading needs is ready before the first
+    one arrives instead of being parsed the first time it's drawn. If the
+    fonts won't load, the labels use terminalio.FONT instead.
+    """
+    global co2_value, icon_label, faces
+
+    def log_slice(name, start):
+        print(f"Font load: {name} took {(time.monotonic_ns() - start) // 1_000_000}ms")
+
+    try:
+        start = time.monotonic_ns()
+        font = load_font("fonts/AvenirNextCondensed-Medium-28.bdf")
+        log_slice("open Avenir", start)
+        await asyncio.sleep(0)
+
+        start = time.monotonic_ns()
+        icons = load_font("fonts/FontAwesomeRegular-28.bdf")
+        log_slice("open icons", start)
+        await asyncio.sleep(0)
+
+        for i in range(0, len(DIGITS), FONT_SLICE_SIZE):
+            glyphs = DIGITS[i:i + FONT_SLICE_SIZE]
+            start = time.monotonic_ns()
+            font.load_glyphs(glyphs)
+            log_slice(f"digits {glyphs}", start)
+            await asyncio.sleep(0)
+
+        start = time.monotonic_ns()
+        icons.load_glyphs(ICON_GLYPHS)
+        log_slice("icons", start)
+        await asyncio.sleep(0)
+    except Exception as e:
+        print(f"Error loading fonts. Your CIRCUITPY board probably doesn't have usable fonts with these names in a folder named 'fonts': {e}")
+        font = None
+
+    start = time.monotonic_ns()
+    if font is not None:
+        # Big CO2 value drawn from pre-rendered digit tiles, see digits.py
+        co2_value = DigitDisplay(
+            font, CO2_DIGITS, scale=2, color=0xFFFFFF,
+            x=HORIZONTAL_START, y=CO2_VAL_VERTICAL+VERTICAL_MOVE)
+        icon_label = label.Label(
+            icons, scale=1, color=0x00FF00,
+            x=HORIZONTAL_START, y=ICON_VERTICAL+VERTICAL_MOVE)
+    else:
+        # Still show the readings, just in the built in font
+        co2_value = label.Label(
+            terminalio.FONT, scale=3, color=0xFFFFFF,
+            x=HORIZONTAL_START, y=CO2_VAL_VERTICAL+VERTICAL_MOVE)
+        icon_label = label.Label(
+            terminalio.FONT, scale=3, color=0x00FF00,
+            x=HORIZONTAL_START, y=ICON_VERTICAL+VERTICAL_MOVE)
+        faces = FALLBACK_FACES
+    with renderer:
+        main_group.insert(2, co2_value)
+        main_group.append(icon_label)
+    log_slice("layout", start)
+    timeline.mark("fonts")
+    fonts_ready.set()
+
+async def display_task():
+    """Animate the loading screen, then redraw on every new reading."""
+    global logger
+    new_reading = sensor.new_reading
+    ticker = Ticker(LOADING_INTERVAL)
+    animation_frame = 0
+    # Only animate until we've received data
+    while not new_reading.is_set():
+        with renderer:
+            update_spinner_animation(animation_frame % len(SPINNER_CHARS))
+        animation_frame += 1
+        await ticker.wait()
+
+    # The CO2 value and icon need the fonts
+    await fonts_ready.wait()
+    while True:
+        await new_reading.wait()
+        new_reading.clear()
+        co2 = sensor.reading["co2"]
+        is_high = co2 >= sensor.CO2_THRESHOLD # True if c02 level is high
+        # Every change for this reading goes out in one refresh
+        with renderer:
+            update_labels(co2, is_high)
+            co2_chart.add(co2)
+        renderer.readings += 1
+        # The refresh is done, so a block written now has the SPI bus to itself
+        if logger:
+            try:
+                logger.add(sensor.reading)
+            except OSError as e:
+                # The card was taken out, failed or is full. Stop logging
+                # rather than stop the app
+                print(f"Error writing to SD card, logging stopped: {e}")
+                logger = None
+            except Exception as e:
+                print(f"Error logging reading: {e}")
+        if telemetry:
+            try:
+                telemetry.send(sensor.reading)
+            except Exception as e:
+                print(f"Error sending reading: {e}")
+        if not timeline.reported:
+            timeline.mark("first_frame")
+            timeline.report()
+
+async def button_task():
+    """Switch between the readings and the trend chart when BOOT is pressed"""
+    keys = keypad.Keys((board.BUTTON,), value_when_pressed=False, pull=True)
+    ticker = Ticker(BUTTON_INTERVAL)
+    while True:
+        event = keys.events.get()
+        if event and event.pressed:
+            with renderer:
+                if display.root_group is main_group:
+                    display.root_group = chart_group
+                else:
+                    display.root_group = main_group
+        await ticker.wait()
+
+async def stats_task():
+    """Print timing stats every STATS_INTERVAL"""
+    ticker = Ticker(STATS_INTERVAL)
+    while True:
+        await ticker.wait()
+        sensor.report()
+        renderer.report()
+        if logger:
+            print(f"SD log: {logger.blocks_written} blocks written")
+
+async def main():
+    # Each task runs on its own schedule, so a slow display refresh
+    # can't delay a sensor read.
+    await asyncio.gather(
+        *[asyncio.create_task(task) for task in sensor.tasks()],
+        asyncio.create_task(font_task()),
+        asyncio.create_task(display_task()),
+        asyncio.create_task(button_task()),
+        asyncio.create_task(stats_task())
+    )
+
+def report_imports(start_heap):
+    """Print how long the app took to import and how much heap it kept.
+
+    tools/build.py --compare reads these lines to compare the .py and .mpy
+    layouts.
+    """
+    layout = "mpy" if __file__.endswith(".mpy") else "py"
+    elapsed = timeline.elapsed("start", "imports")
+    print(f"Import report: layout={layout} ms={elapsed} heap={start_heap - import_heap}")
+
+def run(start_heap):
+    """Run the app. start_heap is gc.mem_free() before it was imported."""
+    report_imports(start_heap)
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+# Storage setup for the CO2 sensor app
+# Copy this file to the CIRCUITPY drive next to code.py
+#
+# CircuitPython runs this once at power on or reset, before code.py. It
+# decides who can write to CIRCUITPY until the next reset. Nothing the app
+# saves goes there by default (the SGP30 baseline is kept in nvm and
+# readings on the microSD card), so that's your computer, so you can edit
+# the files. With DEVICE_WRITES on it's:
+# - your computer, if it's already connected or you hold the BOOT button
+#   (press it just after reset, not during) while this runs
+# - otherwise code.py, so it can save files like the SGP30 baseline file
+# It records which in microcontroller.nvm, so code.py knows right away
+# without waiting for USB or remounting. See nvm_layout.py.
+#
+# It also turns on the second USB serial port telemetry.py sends readings on.
+# The ESP32-S2 and S3 only have room for so many USB endpoints, and the
+# default console, CIRCUITPY drive, HID and MIDI devices use them all, so
+# HID and MIDI, which this app doesn't use, are turned off to make room.
+
+import board, time, digitalio
+import storage, supervisor, microcontroller
+import usb_cdc, usb_hid, usb_midi
+import nvm_layout
+
+# Let code.py write to CIRCUITPY when no computer is connected. Only needed
+# for BASELINE_STORAGE = "file" in sensor_sgp30.py
+DEVICE_WRITES = False
+BUTTON_WINDOW = 0.5  # How long to watch for the BOOT button, in seconds
+USB_DATA = True  # Add the usb_cdc.data port for binary telemetry, see telemetry.py
+
+def button_held():
+    """True if BOOT is held down at any point in BUTTON_WINDOW"""
+    button = digitalio.DigitalInOut(board.BUTTON)
+    button.switch_to_input(pull=digitalio.Pull.UP)
+    deadline = time.monotonic() + BUTTON_WINDOW
+    held = False
+    while not held and time.monotonic() < deadline:
+        held = not button.value
+    button.deinit()
+    return held
+
+# USB usually hasn't started yet when this runs, so usb_connected is only
+# True after a reset that kept the computer connected. That's what the
+# button is for.
+if DEVICE_WRITES and not (supervisor.runtime.usb_connected or button_held()):
+    mode = nvm_layout.MODE_DEVICE
+    storage.remount("/", readonly=False)
+    print("CIRCUITPY is writable from code.py")
+else:
+    mode = nvm_layout.MODE_USB
+    print("CIRCUITPY is writable from the computer")
+
+if microcontroller.nvm is not None:
+    nvm_layout.set_storage_mode(microcontroller.nvm, mode)
+
+# Keep the console as it is and add the data port next to it, in the
+# endpoints HID and MIDI would have used
+if USB_DATA:
+    usb_hid.disable()
+    usb_midi.disable()
+    usb_cdc.enable(console=True, data=True)
@@ -0,0 +1,56 @@
+# Boot timing for the CO2 sensor scripts
+# Copy this file to the CIRCUITPY drive next to code.py
+#
+# Records when each boot phase finished, in supervisor.ticks_ms() (ms since
+# the board powered on or reset), and prints them on one line:
+#
+#     Boot timeline: imports=812 sensor=845 display=910 ... first_frame=5870
+#
+# tools/boot_timeline.py reads those lines from the serial console or a log
+# to show where boot time goes and check time-to-first-reading.
+
+from array import array
+import supervisor
+
+REPORT_PREFIX = "Boot timeline:"
+_TICKS_PERIOD = 1 << 29  # supervisor.ticks_ms() wraps around at this
+
+class BootTimeline:
+    """Fixed-size list of (phase name, ticks_ms) marks."""
+    def __init__(self, size=16):
+        self.names = [None] * size
+        self.ticks = array('L', bytearray(4 * size))
+        self.count = 0
+        self.reported = False
+
+    def mark(self, name):
+        """Record that the phase called name just finished."""
+        if self.count < len(self.names):
+            self.names[self.count] = name
+            self.ticks[self.count] = supervisor.ticks_ms()
+            self.count += 1
+
+    def report(self):
+        """Print the timeline once, with each phase's duration."""
+        if self.reported:
+            return
+        self.reported = True
+        marks = " ".join(f"{self.names[i]}={self.ticks[i]}" for i in range(self.count))
+        print(f"{REPORT_PREFIX} {marks}")
+        previous = 0
+        for i in range(self.count):
+            duration = (self.ticks[i] - previous) % _TICKS_PERIOD
+            print(f"  {self.names[i]:<14}{duration:>7}ms")
+            previous = self.ticks[i]
+
+    def elapsed(self, first, last):
+        """ms from the first named mark to the last, or None if either is missing."""
+        ticks = {}
+        for i in range(self.count):
+            ticks[self.names[i]] = self.ticks[i]
+        if first not in ticks or last not in ticks:
+            return None
+        return (ticks[last] - ticks[first]) % _TICKS_PERIOD
+
+# The one timeline, shared by code.py and the modules it imports
+timeline = BootTimeline()
@@ -0,0 +1,63 @@
+# Scrolling trend chart for the CO2 sensor scripts
+# Copy this file to the CIRCUITPY drive next to code.py
+
+import displayio, bitmaptools
+
+# Palette indexes
+BACKGROUND = 0
+NORMAL = 1
+HIGH = 2
+THRESHOLD = 3
+
+class TrendChart:
+    """Sparkline that scrolls left one column per reading.
+
+    Adding a reading shifts the existing pixels left with one blit and draws
+    only the new right-hand column, so drawing a reading costs the same
+    however full the chart is, and the chart never has to be cleared and
+    re-plotted. Values are plotted on a fixed low to high scale for the same
+    reason. Every pixel moves, though, so while the chart is on screen each
+    reading sends the whole chart over SPI. While it's hidden nothing is
+    sent.
+    """
+    def __init__(self, width, height, low, high, threshold, colors, x=0, y=0):
+        self.bitmap = displayio.Bitmap(width, height, len(colors))
+        self.palette = displayio.Palette(len(colors))
+        for index, color in enumerate(colors):
+            self.palette[index] = color
+        self.tile_grid = displayio.TileGrid(self.bitmap, pixel_shader=self.palette, x=x, y=y)
+        self.low = low
+        self.high = high
+        self.threshold = threshold
+        self.threshold_y = self.to_y(threshold)
+        self.last_y = None
+        self.columns = 0
+
+    def to_y(self, value):
+        """Row for value, clamped to the chart."""
+        value = min(max(value, self.low), self.high)
+        bottom = self.bitmap.height - 1
+        return bottom - (value - self.low) * bottom // (self.high - self.low)
+
+    def add(self, value):
+        width = self.bitmap.width
+        height = self.bitmap.height
+        new_x = width - 1
+
+        # Scroll everything one column left
+        bitmaptools.blit(self.bitmap, self.bitmap, 0, 0, x1=1, y1=0, x2=width, y2=height)
+
+        # Clear the new column and draw a dashed threshold line through it
+        bitmaptools.fill_region(self.bitmap, new_x, 0, width, height, BACKGROUND)
+        if self.columns % 2 == 0:
+            self.bitmap[new_x, self.threshold_y] = THRESHOLD
+
+        # Join this reading to the last one so the line stays continuous
+        y = self.to_y(value)
+        top = y if self.last_y is None else min(y, self.last_y)
+        bottom = y if self.last_y is None else max(y, self.last_y)
+        color = HIGH if value >= self.threshold else NORMAL
+        bitmaptools.fill_region(self.bitmap, new_x, top, width, bottom + 1, color)
+
+        self.last_y = y
+        self.columns += 1
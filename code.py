@@ -0,0 +1,14 @@
+# C02 Sensor in CircuitPython
+# The app itself is in app.py and the modules it imports. Keeping this file
+# small means tools/build.py can precompile everything else to .mpy, so the
+# board doesn't have to compile the app's source on every boot.
+
+import gc
+from boot_timeline import timeline
+
+gc.collect()
+start_heap = gc.mem_free()
+timeline.mark("start")
+
+import app
+app.run(start_heap)
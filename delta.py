@@ -0,0 +1,128 @@
+# Delta compression for the CO2 sensor app's logs
+# Copy this file to the CIRCUITPY drive next to code.py
+#
+# Readings change slowly, so most records can be stored as how far each
+# value is from what the last record predicts. A chunk is:
+#
+#   Keyframe     The first record, packed with its struct format
+#   Records      A change mask byte, then a zig-zag varint for each value
+#                whose bit is set in the mask
+#
+# Bit 0 of the mask is the time, which is predicted to have moved on by the
+# same step as last time. Bit 1 is the first field, and so on, each
+# predicted to be unchanged. A value that matches its prediction costs no
+# bytes at all, so a steady reading every 5 seconds takes 1 byte, and a
+# typical one 2 or 3, instead of 8 raw.
+#
+# Every chunk starts with a keyframe, so each one decodes on its own.
+
+import struct
+
+MAX_VALUES = 8  # Values per record, one mask bit each
+VARINT_SIZE = 5  # Most bytes a 32 bit value's varint takes
+
+def zigzag(n):
+    """Map a signed delta to an unsigned one, small either side of 0: 0, -1, 1, -2 -> 0, 1, 2, 3"""
+    return n << 1 if n >= 0 else ((-n) << 1) - 1
+
+def unzigzag(n):
+    return n >> 1 if not n & 1 else -((n + 1) >> 1)
+
+def put_varint(buffer, offset, value):
+    """Write value 7 bits per byte, low bits first. Returns the offset after it."""
+    while value > 0x7F:
+        buffer[offset] = (value & 0x7F) | 0x80
+        value >>= 7
+        offset += 1
+    buffer[offset] = value
+    return offset + 1
+
+def get_varint(buffer, offset):
+    """Returns (value, offset after it)"""
+    value = 0
+    shift = 0
+    while True:
+        byte = buffer[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+class DeltaEncoder:
+    """Encodes records, (time, value, ...), into a chunk of a preallocated buffer.
+
+    record_format is the struct format of a whole record, used for the
+    keyframe. The chunk runs from start to the end of buffer. Check room()
+    before each add(), and call reset() to start a new chunk once it's been
+    written out. Adding a record doesn't allocate.
+    """
+    def __init__(self, record_format, buffer, start=0):
+        self.format = record_format
+        self.width = len(struct.unpack_from(record_format, bytes(struct.calcsize(record_format))))
+        if self.width > MAX_VALUES:
+            raise ValueError(f"At most {MAX_VALUES - 1} fields can be compressed")
+        self.buffer = buffer
+        self.start = start
+        self.keyframe_size = struct.calcsize(record_format)
+        self.record_limit = max(self.keyframe_size, 1 + self.width * VARINT_SIZE)
+        self.last = [0] * self.width
+        self.reset()
+
+    def reset(self):
+        self.offset = self.start
+        self.count = 0
+        self.step = 0
+
+    def room(self):
+        """True if any record is sure to fit in the chunk"""
+        return len(self.buffer) - self.offset >= self.record_limit
+
+    def add(self, values):
+        buffer = self.buffer
+        last = self.last
+        if self.count == 0:
+            struct.pack_into(self.format, buffer, self.offset, *values)
+            self.offset += self.keyframe_size
+            for i in range(self.width):
+                last[i] = values[i]
+        else:
+            mask_offset = self.offset
+            offset = mask_offset + 1
+            mask = 0
+            step = values[0] - last[0]
+            if step != self.step:
+                mask = 1
+                offset = put_varint(buffer, offset, zigzag(step - self.step))
+                self.step = step
+            last[0] = values[0]
+            for i in range(1, self.width):
+                change = values[i] - last[i]
+                if change:
+                    mask |= 1 << i
+                    offset = put_varint(buffer, offset, zigzag(change))
+                    last[i] = values[i]
+            buffer[mask_offset] = mask
+            self.offset = offset
+        self.count += 1
+
+def decode(record_format, buffer, start, count):
+    """Yield the count records, as tuples, in the chunk at start."""
+    if not count:
+        return
+    values = list(struct.unpack_from(record_format, buffer, start))
+    yield tuple(values)
+    offset = start + struct.calcsize(record_format)
+    step = 0
+    for _ in range(count - 1):
+        mask = buffer[offset]
+        offset += 1
+        if mask & 1:
+            change, offset = get_varint(buffer, offset)
+            step += unzigzag(change)
+        values[0] += step
+        for i in range(1, len(values)):
+            if mask & (1 << i):
+                change, offset = get_varint(buffer, offset)
+                values[i] += unzigzag(change)
+        yield tuple(values)
@@ -0,0 +1,74 @@
+# Fast number display for the CO2 sensor scripts
+# Copy this file to the CIRCUITPY drive next to code.py
+
+import displayio, bitmaptools
+
+DIGITS = "0123456789"
+BLANK = 10  # Tile index of the empty cell after the digits
+
+class DigitDisplay(displayio.Group):
+    """Shows a whole number as a row of tiles cut from a pre-drawn digit sheet.
+
+    Digits 0-9 are drawn from the font into one sprite sheet bitmap when
+    this is created. Showing a value after that only changes the indexes of
+    the tiles whose digit changed, so there's no glyph lookup, text layout
+    or memory allocation per reading. Numbers are left aligned like a Label
+    and y is the vertical center of the digits. tiles is the most digits
+    that can be shown.
+    """
+    def __init__(self, font, tiles, color, scale=1, x=0, y=0):
+        font.load_glyphs(DIGITS)
+        glyphs = [font.get_glyph(ord(digit)) for digit in DIGITS]
+        cell_width = max(glyph.shift_x for glyph in glyphs)
+        _, cell_height, _, y_offset = font.get_bounding_box()
+        baseline = cell_height + y_offset
+
+        # One cell per digit plus a blank one
+        sheet = displayio.Bitmap(cell_width * (len(DIGITS) + 1), cell_height, 2)
+        for index, glyph in enumerate(glyphs):
+            bitmaptools.blit(
+                sheet, glyph.bitmap,
+                index * cell_width + max(0, glyph.dx),
+                max(0, baseline - glyph.height - glyph.dy))
+
+        super().__init__(scale=scale, x=x, y=y - cell_height * scale // 2)
+        self.palette = displayio.Palette(2)
+        self.palette.make_transparent(0)
+        self.palette[1] = color
+        self.grid = displayio.TileGrid(
+            sheet, pixel_shader=self.palette, width=tiles, height=1,
+            tile_width=cell_width, tile_height=cell_height, default_tile=BLANK)
+        self.append(self.grid)
+        # Tile index currently shown in each position
+        self.shown = bytearray([BLANK] * tiles)
+
+    @property
+    def color(self):
+        return self.palette[1]
+
+    @color.setter
+    def color(self, color):
+        self.palette[1] = color
+
+    def _set_tile(self, position, index):
+        if self.shown[position] != index:
+            self.grid[position] = index
+            self.shown[position] = index
+
+    def show(self, value):
+        """Show a whole number, without allocating."""
+        length = 1
+        place = 1
+        while value // place >= 10:
+            place *= 10
+            length += 1
+        for position in range(len(self.shown)):
+            if position < length:
+                self._set_tile(position, value // place % 10)
+                place //= 10
+            else:
+                self._set_tile(position, BLANK)
+
+    def clear(self):
+        for position in range(len(self.shown)):
+            self._set_tile(position, BLANK)
@@ -0,0 +1,278 @@
+# Reading history for the CO2 sensor scripts
+# Copy this file to the CIRCUITPY drive next to code.py
+#
+# Everything is preallocated when a Channel is created, so adding a reading
+# never allocates memory and takes the same time however long the board
+# has been running.
+
+from array import array
+
+HOUR = 3600
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+
+def zeros(typecode, size):
+    """A preallocated array of size zeros."""
+    return array(typecode, bytearray(size * array(typecode).itemsize))
+
+class RollingStats:
+    """Min, max, mean and time above a threshold over a sliding window.
+
+    The window is split into `blocks` blocks of block_size samples. Each
+    sample only updates the block being filled. When that block is full its
+    totals replace the oldest block's, and the min and max over the full
+    blocks are found again, so each add() costs the same on average. The
+    window covers the last `blocks` full blocks plus the one being filled.
+    """
+    def __init__(self, typecode, window, blocks, interval, threshold=None):
+        self.block_size = max(1, window // blocks // interval)
+        self.interval = interval
+        self.threshold = threshold
+        self.mins = zeros(typecode, blocks)
+        self.maxes = zeros(typecode, blocks)
+        self.sums = zeros('l', blocks)
+        self.aboves = zeros('H', blocks)
+        self.head = 0  # Next block to overwrite
+        self.full_blocks = 0
+        # Totals for the full blocks
+        self.full_min = 0
+        self.full_max = 0
+        self.full_sum = 0
+        self.full_above = 0
+        # The block being filled
+        self.count = 0
+        self.block_min = 0
+        self.block_max = 0
+        self.block_sum = 0
+        self.block_above = 0
+
+    def add(self, value):
+        if self.count == 0 or value < self.block_min:
+            self.block_min = value
+        if self.count == 0 or value > self.block_max:
+            self.block_max = value
+        self.block_sum += value
+        if self.threshold is not None and value >= self.threshold:
+            self.block_above += 1
+        self.count += 1
+        if self.count == self.block_size:
+            self._close_block()
+
+    def _close_block(self):
+        head = self.head
+        blocks = len(self.sums)
+        if self.full_blocks == blocks:
+            # Drop the oldest block from the totals
+            self.full_sum -= self.sums[head]
+            self.full_above -= self.aboves[head]
+        else:
+            self.full_blocks += 1
+        self.mins[head] = self.block_min
+        self.maxes[head] = self.block_max
+        self.sums[head] = self.block_sum
+        self.aboves[head] = self.block_above
+        self.full_sum += self.block_sum
+        self.full_above += self.block_above
+        self.head = (head + 1) % blocks
+
+        # Once per block, so this loop is spread over block_size samples
+        low = self.mins[0]
+        high = self.maxes[0]
+        for i in range(1, self.full_blocks):
+            if self.mins[i] < low:
+                low = self.mins[i]
+            if self.maxes[i] > high:
+                high = self.maxes[i]
+        self.full_min = low
+        self.full_max = high
+
+        self.count = 0
+        self.block_sum = 0
+        self.block_above = 0
+
+    def samples(self):
+        """Number of samples currently in the window."""
+        return self.full_blocks * self.block_size + self.count
+
+    def minimum(self):
+        if not self.full_blocks:
+            return self.block_min if self.count else None
+        if self.count and self.block_min < self.full_min:
+            return self.block_min
+        return self.full_min
+
+    def maximum(self):
+        if not self.full_blocks:
+            return self.block_max if self.count else None
+        if self.count and self.block_max > self.full_max:
+            return self.block_max
+        return self.full_max
+
+    def mean(self):
+        samples = self.samples()
+        if not samples:
+            return None
+        return (self.full_sum + self.block_sum) / samples
+
+    def time_above(self):
+        """Seconds in the window spent at or above the threshold."""
+        return (self.full_above + self.block_above) * self.interval
+
+    def summary(self, unit=""):
+        """The stats as one line of text, for the stats report."""
+        if not self.samples():
+            return "no readings yet"
+        text = f"min {self.minimum()}{unit}, max {self.maximum()}{unit}, mean {self.mean():.0f}{unit}"
+        if self.threshold is not None:
+            text += f", {self.time_above() // 60}min at or above {self.threshold}{unit}"
+        return text
+
+class Tier:
+    """Fixed-size ring of min/mean/max buckets, each `seconds` long."""
+    def __init__(self, typecode, seconds, size, inputs):
+        self.seconds = seconds
+        self.inputs = inputs  # Samples or finer buckets per bucket
+        self.mins = zeros(typecode, size)
+        self.means = zeros(typecode, size)
+        self.maxes = zeros(typecode, size)
+        self.head = 0
+        self.count = 0
+        # The bucket being filled
+        self.filled = 0
+        self.low = 0
+        self.high = 0
+        self.total = 0
+
+    def add(self, low, mean, high):
+        """Fold in one input. Returns True when that completes a bucket."""
+        if self.filled == 0 or low < self.low:
+            self.low = low
+        if self.filled == 0 or high > self.high:
+            self.high = high
+        self.total += mean
+        self.filled += 1
+        if self.filled < self.inputs:
+            return False
+        head = self.head
+        self.mins[head] = self.low
+        self.means[head] = self.total // self.filled
+        self.maxes[head] = self.high
+        self.head = (head + 1) % len(self.means)
+        if self.count < len(self.means):
+            self.count += 1
+        self.filled = 0
+        self.total = 0
+        return True
+
+    def span(self):
+        """Seconds of history currently held."""
+        return self.count * self.seconds
+
+    def capacity(self):
+        return len(self.means) * self.seconds
+
+    def get(self, age):
+        """(min, mean, max) of the bucket from `age` buckets ago; 0 is the newest."""
+        if age >= self.count:
+            raise IndexError("not that many buckets")
+        i = (self.head - 1 - age) % len(self.means)
+        return self.mins[i], self.means[i], self.maxes[i]
+
+class Pyramid:
+    """Long-term history kept at several resolutions.
+
+    Readings roll up into the finest tier, and each full bucket rolls up
+    into the next coarser one. With the default tiers a month of one
+    channel takes about 6KB: two hours of 1 minute buckets, a day of
+    10 minute buckets and 31 days of 1 hour buckets.
+    """
+    def __init__(self, typecode, interval, tiers=((60, 120), (600, 144), (HOUR, 744))):
+        self.tiers = []
+        finer = interval
+        for seconds, size in tiers:
+            self.tiers.append(Tier(typecode, seconds, size, max(1, seconds // finer)))
+            finer = seconds
+
+    def add(self, value):
+        low = mean = high = value
+        for tier in self.tiers:
+            if not tier.add(low, mean, high):
+                break
+            # Pass the finished bucket up to the next tier
+            i = (tier.head - 1) % len(tier.means)
+            low, mean, high = tier.mins[i], tier.means[i], tier.maxes[i]
+
+    def select(self, span, max_points=None):
+        """Pick the tier to answer a query covering the last `span` seconds.
+
+        Returns (tier, number of buckets). Uses the finest tier that holds
+        enough history and, if max_points is given, needs no more than
+        max_points buckets to cover the span. Falls back to the coarsest
+        tier.
+        """
+        for tier in self.tiers:
+            buckets = -(-span // tier.seconds)
+            if tier.capacity() >= span and (max_points is None or buckets <= max_points):
+                return tier, min(buckets, tier.count)
+        tier = self.tiers[-1]
+        return tier, min(-(-span // tier.seconds), tier.count)
+
+    def stats(self, span):
+        """(min, mean, max) over the last `span` seconds, from the tier
+        select() picks, or None until that tier has a bucket."""
+        tier, buckets = self.select(span)
+        if not buckets:
+            return None
+        low, total, high = tier.get(0)
+        for age in range(1, buckets):
+            bucket_low, mean, bucket_high = tier.get(age)
+            if bucket_low < low:
+                low = bucket_low
+            if bucket_high > high:
+                high = bucket_high
+            total += mean
+        return low, total / buckets, high
+
+class Channel:
+    """Ring buffer of one kind of reading plus its 1 hour and 24 hour stats,
+    and a Pyramid of longer-term history.
+
+    typecode is the array type the readings fit in, e.g. 'H' for CO2 ppm
+    or 'h' for degrees F. interval is the number of seconds between
+    readings.
+    """
+    def __init__(self, typecode, size, interval, threshold=None):
+        self.samples = zeros(typecode, size)
+        self.head = 0  # Where the next reading goes
+        self.count = 0
+        # 12 five-minute blocks and 24 one-hour blocks
+        self.hour = RollingStats(typecode, HOUR, 12, interval, threshold)
+        self.day = RollingStats(typecode, DAY, 24, interval, threshold)
+        self.trend = Pyramid(typecode, interval)
+
+    def add(self, value):
+        self.samples[self.head] = value
+        self.head = (self.head + 1) % len(self.samples)
+        if self.count < len(self.samples):
+            self.count += 1
+        self.hour.add(value)
+        self.day.add(value)
+        self.trend.add(value)
+
+    def report(self, name, unit=""):
+        """Print the 1 hour and 24 hour stats, and the last week's trend."""
+        print(f"{name} last 1h: {self.hour.summary(unit)}")
+        print(f"{name} last 24h: {self.day.summary(unit)}")
+        trend = self.trend.stats(WEEK)
+        if trend:
+            low, mean, high = trend
+            print(f"{name} last 7d: min {low}{unit}, max {high}{unit}, mean {mean:.0f}{unit}")
+
+    def __len__(self):
+        return self.count
+
+    def get(self, age):
+        """The reading from `age` readings ago; 0 is the newest."""
+        if age >= self.count:
+            raise IndexError("not that many readings")
+        return self.samples[(self.head - 1 - age) % len(self.samples)]
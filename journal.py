@@ -0,0 +1,180 @@
+# Power-loss safe record storage for the CO2 sensor app
+# Copy this file to the CIRCUITPY drive next to code.py
+
+import os
+import time
+import struct
+from binascii import crc32
+import nvm_layout
+
+CRC_SIZE = 4
+
+class FileStore:
+    """Journal storage in a preallocated file on CIRCUITPY.
+
+    The file is created at its full size on the first write and after that
+    only ever overwritten in place, so writing doesn't grow or truncate it
+    and the filesystem's allocation table is left alone. Needs the
+    filesystem to be writable, so not while a computer has it mounted.
+    """
+    on_filesystem = True
+
+    def __init__(self, path):
+        self.path = path
+        self.size = 0
+
+    def attach(self, size):
+        self.size = size
+
+    def read(self):
+        """The stored bytes, or None if there aren't any yet"""
+        try:
+            with open(self.path, "rb") as f:
+                return f.read(self.size)
+        except OSError:
+            return None
+
+    def _open(self):
+        try:
+            if os.stat(self.path)[6] == self.size:
+                return open(self.path, "r+b")
+        except OSError:
+            pass
+        # First write, or the layout changed: write the whole file once
+        with open(self.path, "wb") as f:
+            f.write(bytes(self.size))
+        return open(self.path, "r+b")
+
+    def write(self, offset, data):
+        with self._open() as f:
+            f.seek(offset)
+            f.write(data)
+
+    def flush(self, force=False):
+        return True
+
+class NvmStore:
+    """Journal storage in a region of microcontroller.nvm, see nvm_layout.py.
+
+    nvm isn't part of the USB drive, so it can be written whether or not a
+    computer is connected and without remounting anything. Every write to
+    it erases and rewrites flash, so writes are coalesced: write() only
+    changes a copy in RAM, and flush() sends everything that changed since
+    the last flush to nvm as one write, at most once every min_interval
+    seconds. Writes in between stay in RAM until the next flush() after
+    that, so however often records are saved the erase count stays bounded.
+    """
+    on_filesystem = False
+
+    def __init__(self, start, size, min_interval=0):
+        import microcontroller
+        self.nvm = microcontroller.nvm
+        if self.nvm is None or len(self.nvm) < start + size:
+            raise ValueError("microcontroller.nvm is too small")
+        self.start = start
+        self.limit = size
+        self.min_interval = min_interval
+        self.last_flush = None
+        self.copy = None
+
+    def attach(self, size):
+        if size > self.limit:
+            raise ValueError("Journal doesn't fit in its nvm region")
+        self.size = size
+        self.copy = bytearray(size)
+        if nvm_layout.valid(self.nvm):
+            self.copy[:] = self.nvm[self.start:self.start + size]
+        self.dirty_start = size
+        self.dirty_end = 0
+
+    def read(self):
+        return self.copy
+
+    def write(self, offset, data):
+        end = offset + len(data)
+        self.copy[offset:end] = data
+        self.dirty_start = min(self.dirty_start, offset)
+        self.dirty_end = max(self.dirty_end, end)
+
+    def flush(self, force=False):
+        """Write pending changes to nvm. Returns False if they're still waiting."""
+        if self.dirty_end <= self.dirty_start:
+            return True
+        now = time.monotonic()
+        if not force and self.last_flush is not None and now - self.last_flush < self.min_interval:
+            return False
+        if not nvm_layout.valid(self.nvm):
+            nvm_layout.reset(self.nvm)
+        start = self.start + self.dirty_start
+        self.nvm[start:self.start + self.dirty_end] = self.copy[self.dirty_start:self.dirty_end]
+        self.dirty_start = self.size
+        self.dirty_end = 0
+        self.last_flush = now
+        return True
+
+class Journal:
+    """Fixed-size binary records written round-robin into a store.
+
+    Each record is a version byte, the values packed with record_format, a
+    sequence number and a CRC32 of everything before it. save() overwrites
+    the slot after the newest record, so a write cut short by a power loss
+    can only damage that one slot, and load() falls back to the newest
+    record that still checks out. Records from another version are ignored.
+    Each save packs into one preallocated buffer.
+    """
+    def __init__(self, store, record_format, version=1, slots=16):
+        self.store = store
+        self.version = version
+        self.format = ">B" + record_format + "I"  # version, values, sequence
+        self.data_size = struct.calcsize(self.format)
+        self.record_size = self.data_size + CRC_SIZE
+        self.slots = slots
+        self.buffer = bytearray(self.record_size)
+        self.sequence = 0
+        self.slot = -1  # Slot holding the newest record
+        store.attach(slots * self.record_size)
+
+    def _unpack(self, data, offset):
+        """The values and sequence number at offset, or None if it isn't a valid record"""
+        record = memoryview(data)[offset:offset + self.record_size]
+        crc = struct.unpack_from(">I", record, self.data_size)[0]
+        if crc != crc32(record[:self.data_size]):
+            return None
+        values = struct.unpack_from(self.format, record)
+        if values[0] != self.version:
+            return None
+        return values[1:]
+
+    def load(self):
+        """Return the values in the newest valid record, or None if there isn't one."""
+        data = self.store.read()
+        if not data:
+            return None
+        newest = None
+        for slot in range(min(self.slots, len(data) // self.record_size)):
+            record = self._unpack(data, slot * self.record_size)
+            if record and (newest is None or record[-1] > newest[-1]):
+                newest = record
+                self.slot = slot
+        if newest is None:
+            return None
+        self.sequence = newest[-1]
+        return newest[:-1]
+
+    def save(self, *values):
+        """Write values as the newest record.
+
+        Raises OSError if the store can't be written, such as a file on a
+        read-only filesystem. Returns False if the store is holding the
+        record back to coalesce writes.
+        """
+        if self.slot < 0:
+            self.load()
+        slot = (self.slot + 1) % self.slots
+        struct.pack_into(self.format, self.buffer, 0, self.version, *values, self.sequence + 1)
+        struct.pack_into(">I", self.buffer, self.data_size,
+                         crc32(memoryview(self.buffer)[:self.data_size]))
+        self.store.write(slot * self.record_size, self.buffer)
+        self.slot = slot
+        self.sequence += 1
+        return self.store.flush()
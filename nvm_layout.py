@@ -0,0 +1,45 @@
+# Where the CO2 sensor app keeps things in microcontroller.nvm
+# Copy this file to the CIRCUITPY drive next to code.py
+#
+# Byte offsets:
+#   0  b"CO2" and VERSION, so nvm left behind by other code is ignored
+#   4  Storage mode boot.py chose at the last reset
+#   8  SGP30 baseline journal, see journal.py
+#
+# Change VERSION if anything moves, and whatever was saved under the old
+# layout is ignored rather than misread.
+
+MAGIC = b"CO2"
+VERSION = 1
+HEADER_SIZE = 4
+STORAGE_MODE = 4
+BASELINE = 8
+BASELINE_SIZE = 512
+
+# Storage modes
+MODE_UNKNOWN = 0  # boot.py hasn't run, so code.py has to work it out
+MODE_USB = 1  # A computer can write to CIRCUITPY, code.py can't
+MODE_DEVICE = 2  # code.py can write to CIRCUITPY, a computer can only read it
+
+def valid(nvm):
+    """True if nvm holds this layout"""
+    return nvm[0:HEADER_SIZE] == MAGIC + bytes((VERSION,))
+
+def reset(nvm):
+    """Clear everything this layout uses and write its header, in one write."""
+    used = bytearray(BASELINE + BASELINE_SIZE)
+    used[0:HEADER_SIZE] = MAGIC + bytes((VERSION,))
+    nvm[0:len(used)] = used
+
+def storage_mode(nvm):
+    """The storage mode boot.py recorded, or MODE_UNKNOWN"""
+    if nvm is None or not valid(nvm):
+        return MODE_UNKNOWN
+    return nvm[STORAGE_MODE]
+
+def set_storage_mode(nvm, mode):
+    """Record the storage mode, only writing nvm if it's changed."""
+    if not valid(nvm):
+        reset(nvm)
+    if nvm[STORAGE_MODE] != mode:
+        nvm[STORAGE_MODE] = mode
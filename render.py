@@ -0,0 +1,58 @@
+# Batched display refreshes for the CO2 sensor scripts
+# Copy this file to the CIRCUITPY drive next to code.py
+
+import time
+
+class Renderer:
+    """Applies a batch of display changes as a single refresh.
+
+    Turns off auto_refresh so displayio can't send half-applied changes, like
+    a new background color with the old label colors, across several
+    refreshes. Make the changes inside `with renderer:` and the display is
+    refreshed once on the way out. Nested `with` blocks share one refresh.
+
+    budget is how long, in seconds, a refresh should take. Refreshes that
+    take longer are counted so they show up in report().
+    """
+    def __init__(self, display, budget):
+        display.auto_refresh = False
+        self.display = display
+        self.budget = int(budget * 1_000_000_000)
+        self.depth = 0
+        self.reset()
+
+    def reset(self):
+        self.refreshes = 0
+        self.readings = 0  # Readings drawn, counted by the caller
+        self.refresh_total = 0
+        self.refresh_max = 0
+        self.over_budget = 0
+
+    def __enter__(self):
+        self.depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.depth -= 1
+        if self.depth == 0:
+            self.refresh()
+
+    def refresh(self):
+        start = time.monotonic_ns()
+        self.display.refresh()
+        elapsed = time.monotonic_ns() - start
+        self.refreshes += 1
+        self.refresh_total += elapsed
+        if elapsed > self.refresh_max:
+            self.refresh_max = elapsed
+        if elapsed > self.budget:
+            self.over_budget += 1
+
+    def report(self):
+        if self.refreshes:
+            average = self.refresh_total // self.refreshes // 1_000_000
+            per_reading = self.refreshes / self.readings if self.readings else 0
+            print(f"Display: {self.refreshes} refreshes ({per_reading:.1f} per reading), "
+                  f"refresh avg {average}ms max {self.refresh_max // 1_000_000}ms, "
+                  f"{self.over_budget} over budget")
+        self.reset()
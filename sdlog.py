@@ -0,0 +1,341 @@
+# Reading log on the display breakout's microSD card
+# Copy this file to the CIRCUITPY drive next to code.py
+#
+# The log is a file of 512 byte blocks, the SD card's own block size, so
+# every write lines up with exactly one block on the card:
+#
+#   Block 0      Header: MAGIC, VERSION, then the fields as text like
+#                "co2:H,temp:h,humidity:B" (name:struct format)
+#   Block 1...   BLOCK_HEADER (type, flags, record count), then that many
+#                records, zero padded to 512 bytes
+#
+# A record is a big-endian ">I" time.time() followed by the fields. In a
+# RAW_BLOCK they're packed one after another. A DELTA_BLOCK is one chunk
+# from delta.py, which fits several times as many readings in a block and
+# still decodes without the blocks before it. New blocks are DELTA_BLOCKs.
+#
+# Next to the log, path + ".idx" is its index: an INDEX_ENTRY for each
+# block, the time of its first record, its byte offset in the log and its
+# segment, appended as the block is written. The board has no clock that
+# keeps time while it's off, so each time it starts time.time() counts up
+# from 2000 again. A block starting earlier than the last record before it
+# starts a new segment, so times only go up within a segment, and
+# read_range() finds where a time range starts in each one with a binary
+# search of the index rather than reading the log from the start.
+#
+# tools/read_log.py turns a log back into CSV.
+
+import os
+import time
+import struct
+from delta import DeltaEncoder, decode
+
+BLOCK_SIZE = 512
+MAGIC = b"CO2LOG"
+VERSION = 1
+BLOCK_HEADER = ">BBH"  # Block type, flags, record count
+BLOCK_HEADER_SIZE = struct.calcsize(BLOCK_HEADER)
+RAW_BLOCK = 1
+DELTA_BLOCK = 2
+INDEX_ENTRY = ">IIH"  # Time of a block's first record, the block's offset in the log, its segment
+INDEX_ENTRY_SIZE = struct.calcsize(INDEX_ENTRY)
+LATEST = 0xFFFFFFFF  # Later than any ">I" time
+
+def mount_sd(spi, cs, path="/sd"):
+    """Mount the card on the SPI bus the display uses. Returns False if there's no card."""
+    try:
+        import sdcardio, storage
+        card = sdcardio.SDCard(spi, cs)
+        storage.mount(storage.VfsFat(card), path)
+        return True
+    except (ImportError, OSError) as e:
+        print(f"No microSD card, so readings won't be logged: {e}")
+        return False
+
+def make_header(fields):
+    """The header block for a log of fields, ((name, struct format), ...)"""
+    header = bytearray(BLOCK_SIZE)
+    description = ",".join(f"{name}:{code}" for name, code in fields).encode()
+    struct.pack_into(">6sBB", header, 0, MAGIC, VERSION, len(description))
+    header[8:8 + len(description)] = description
+    return header
+
+def record_format(fields):
+    """The struct format of a record: the time, then the fields"""
+    return ">I" + "".join(code for _, code in fields)
+
+def index_path(path):
+    return path + ".idx"
+
+def read_header(block):
+    """The fields, ((name, struct format), ...), from a header block"""
+    magic, version, length = struct.unpack_from(">6sBB", block, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a CO2 sensor log")
+    if version != VERSION:
+        raise ValueError(f"Log version {version}, this reads version {VERSION}")
+    description = bytes(block[8:8 + length]).decode()
+    return tuple(tuple(field.split(":")) for field in description.split(","))
+
+def read_block(block, record_format):
+    """Yield the records in a block as (time, value, ...) tuples.
+
+    Padding yields nothing. Raises ValueError for a block type this doesn't
+    know.
+    """
+    kind, _, count = struct.unpack_from(BLOCK_HEADER, block, 0)
+    if kind == DELTA_BLOCK:
+        yield from decode(record_format, block, BLOCK_HEADER_SIZE, count)
+    elif kind == RAW_BLOCK:
+        record_size = struct.calcsize(record_format)
+        for index in range(count):
+            yield struct.unpack_from(record_format, block, BLOCK_HEADER_SIZE + index * record_size)
+    elif kind or count:
+        raise ValueError(f"Unknown block type {kind}")
+
+def first_time(block):
+    """The time of the first record in a block, or None if it's padding"""
+    kind, _, count = struct.unpack_from(BLOCK_HEADER, block, 0)
+    if kind not in (RAW_BLOCK, DELTA_BLOCK) or not count:
+        return None
+    return struct.unpack_from(">I", block, BLOCK_HEADER_SIZE)[0]
+
+def last_time(block, record_format):
+    """The time of the last record in a block, or None if it's padding"""
+    if first_time(block) is None:
+        return None
+    for values in read_block(block, record_format):
+        pass
+    return values[0]
+
+def read_entry(index, number, entry):
+    """(time, offset, segment) of an open index's entry number, read into entry"""
+    index.seek(number * INDEX_ENTRY_SIZE)
+    index.readinto(entry)
+    return struct.unpack_from(INDEX_ENTRY, entry, 0)
+
+def find_entry(index, count, segment, when):
+    """Binary search an open index of count entries for where (segment, when) goes.
+
+    That's the number of entries from earlier segments or starting at or
+    before when in segment.
+    """
+    entry = bytearray(INDEX_ENTRY_SIZE)
+    low = 0
+    high = count
+    while low < high:
+        middle = (low + high) // 2
+        start, _, entry_segment = read_entry(index, middle, entry)
+        if entry_segment < segment or (entry_segment == segment and start <= when):
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+def matches(f, block, start, offset):
+    """True if the log open as f has a block at offset starting at time start.
+
+    Reads the block into block. Checks an index's last entry, so an index
+    that doesn't belong to the log, or is in an older format, isn't used.
+    """
+    if offset < BLOCK_SIZE or offset % BLOCK_SIZE:
+        return False
+    f.seek(offset)
+    return f.readinto(block) == BLOCK_SIZE and first_time(block) == start
+
+def read_range(path, start, end, segment=None):
+    """Yield the records from a log with start <= time < end, in the order logged.
+
+    Only reads the blocks that can hold them, found in each segment with
+    the index if there's one, or just those in segment if it's given.
+    Blocks after the last indexed one are all read. Without an index, or
+    with one that doesn't match the log, the whole log is read as one
+    segment.
+    """
+    block = bytearray(BLOCK_SIZE)
+    entry = bytearray(INDEX_ENTRY_SIZE)
+    with open(path, "rb") as f:
+        f.readinto(block)
+        record = record_format(read_header(block))
+        # (first block to read, block to stop before or None) for each segment
+        spans = [(BLOCK_SIZE, None)]
+        last_indexed = 0  # Blocks after this one may not be in time order
+        try:
+            with open(index_path(path), "rb") as index:
+                index.seek(0, 2)
+                count = index.tell() // INDEX_ENTRY_SIZE
+                last, last_indexed, last_segment = read_entry(index, count - 1, entry) if count else (0, 0, 0)
+                if matches(f, block, last, last_indexed):
+                    spans = []
+                    for number in range(last_segment + 1) if segment is None else (segment,):
+                        first = find_entry(index, count, number - 1, LATEST)
+                        stop = find_entry(index, count, number, LATEST)
+                        if first == stop:
+                            continue
+                        first = max(first, find_entry(index, count, number, start) - 1)
+                        spans.append((read_entry(index, first, entry)[1],
+                                      read_entry(index, stop, entry)[1] if stop < count else None))
+                else:
+                    last_indexed = 0
+        except OSError:
+            pass
+        for offset, stop in spans:
+            f.seek(offset)
+            while (stop is None or offset < stop) and f.readinto(block) == BLOCK_SIZE:
+                block_start = first_time(block)
+                if block_start is not None and block_start >= end and offset <= last_indexed:
+                    break
+                for values in read_block(block, record):
+                    if start <= values[0] < end:
+                        yield values
+                offset += BLOCK_SIZE
+
+class BlockLog:
+    """Appends fixed-width binary records to a log file a block at a time.
+
+    Records are delta encoded into one preallocated 512 byte buffer, and a
+    block is only written once it's full, so the card sees one
+    aligned whole-block write per block instead of a read-modify-write per
+    reading. Call add() just after a display refresh and the write lands
+    in the gap before the next one, so the SPI bus the two share is never
+    busy with both at once.
+
+    A log with different fields is moved to path + ".old" and a new one
+    started, so one file always holds one kind of record. The index is
+    kept up to date as blocks are written, and any blocks missing from it,
+    say after a power loss, are added when the log is opened.
+    """
+    def __init__(self, path, fields):
+        self.path = path
+        self.fields = [name for name, _ in fields]
+        self.format = record_format(fields)
+        self.block = bytearray(BLOCK_SIZE)
+        self.empty = bytes(BLOCK_SIZE)
+        self.encoder = DeltaEncoder(self.format, self.block, BLOCK_HEADER_SIZE)
+        self.values = [0] * (len(self.fields) + 1)  # Time, then the fields
+        self.entry = bytearray(INDEX_ENTRY_SIZE)
+        self.segment = 0  # Of the newest index entry
+        self.last_time = None  # Of the last record in the newest indexed block
+        self.records_written = 0
+        self.blocks_written = 0
+        self._open(make_header(fields))
+        self._open_index()
+
+    def _open(self, header):
+        existing = bytearray(BLOCK_SIZE)
+        try:
+            with open(self.path, "rb") as f:
+                f.readinto(existing)
+        except OSError:
+            existing = None
+        if existing is not None and existing != header:
+            old = self.path + ".old"
+            for target in (old, index_path(old)):
+                try:
+                    os.remove(target)
+                except OSError:
+                    pass
+            os.rename(self.path, old)
+            try:
+                os.rename(index_path(self.path), index_path(old))
+            except OSError:
+                pass
+            existing = None
+
+        if existing is not None:
+            self.size = os.stat(self.path)[6]
+            cut = self.size % BLOCK_SIZE
+            if self.size < BLOCK_SIZE:
+                # Not even the header was written, so start again
+                os.remove(self.path)
+                existing = None
+            elif cut:
+                # The last write was cut short, so its record count can't be
+                # trusted. Blank the block out and carry on after it.
+                with open(self.path, "r+b") as f:
+                    f.seek(self.size - cut)
+                    f.write(self.empty)
+                self.size += BLOCK_SIZE - cut
+
+        self.file = open(self.path, "ab")
+        if existing is None:
+            self.file.write(header)
+            self.size = BLOCK_SIZE
+        self.file.flush()
+
+    def _open_index(self):
+        path = index_path(self.path)
+        offset = 0  # The last indexed block
+        try:
+            size = os.stat(path)[6]
+        except OSError:
+            size = 0
+        with open(self.path, "rb") as f:
+            valid = size % INDEX_ENTRY_SIZE == 0
+            if size and valid:
+                with open(path, "rb") as index:
+                    start, offset, self.segment = read_entry(index, size // INDEX_ENTRY_SIZE - 1, self.entry)
+                valid = offset < self.size and matches(f, self.block, start, offset)
+                if valid:
+                    self.last_time = last_time(self.block, self.format)
+            if not valid:
+                # Cut short or from another log: start it again
+                os.remove(path)
+                self.segment, self.last_time, offset = 0, None, 0
+
+            self.index = open(path, "ab")
+            # Index any blocks written after the last entry
+            offset += BLOCK_SIZE
+            f.seek(offset)
+            while offset < self.size and f.readinto(self.block) == BLOCK_SIZE:
+                self._index_block(offset, last_time(self.block, self.format))
+                offset += BLOCK_SIZE
+        self.block[:] = self.empty
+
+    def _index_block(self, offset, last):
+        """Add the block in self.block, at offset in the log, to the index.
+
+        last is the time of its last record.
+        """
+        start = first_time(self.block)
+        if start is None:
+            return
+        if self.last_time is not None and start < self.last_time:
+            # The clock went back, most likely because the board restarted
+            self.segment += 1
+        struct.pack_into(INDEX_ENTRY, self.entry, 0, start, offset, self.segment)
+        self.index.write(self.entry)
+        self.index.flush()
+        self.last_time = last
+
+    def add(self, reading):
+        """Log the fields of a reading dict, writing out the block if that fills it."""
+        values = self.values
+        values[0] = int(time.time())
+        for index, name in enumerate(self.fields):
+            values[index + 1] = reading[name]
+        self.encoder.add(values)
+        if not self.encoder.room():
+            self.flush()
+
+    def flush(self):
+        """Write the records so far as one block, padded if it isn't full."""
+        count = self.encoder.count
+        if not count:
+            return
+        struct.pack_into(BLOCK_HEADER, self.block, 0, DELTA_BLOCK, 0, count)
+        self.file.write(self.block)
+        self.file.flush()
+        self._index_block(self.size, self.encoder.last[0])
+        self.size += BLOCK_SIZE
+        self.records_written += count
+        self.blocks_written += 1
+        self.block[:] = self.empty
+        self.encoder.reset()
+
+    def read_range(self, start, end):
+        """Yield the records with start <= time < end, including ones not written yet."""
+        yield from read_range(self.path, start, end)
+        for values in decode(self.format, self.block, BLOCK_HEADER_SIZE, self.encoder.count):
+            if start <= values[0] < end:
+                yield values
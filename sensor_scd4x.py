@@ -0,0 +1,256 @@
+# SCD4x support for the CO2 sensor app
+# Copy this file to the CIRCUITPY drive next to code.py
+#
+# app.py imports this when it finds an Adafruit SCD40 or SCD41 CO2 sensor
+# on the STEMMA QT connector. It measures CO2, temperature and humidity.
+
+import time
+import asyncio
+import adafruit_scd4x
+from history import Channel
+from boot_timeline import timeline
+from ticker import sleep_until
+
+# Display Constants
+# Labels shown under the CO2 value: (name, x, y, scale)
+LABELS = (
+    ("temp", 67, 76, 3),
+    ("humidity", 67, 105, 3)
+)
+
+# Logging Constants
+# Fields app.py logs to the microSD card and sends over USB each reading:
+# (name, struct format), the same sizes history.py keeps. See sdlog.py and
+# telemetry.py. The SCD4x reads up to 140°F, too much for a "b".
+LOG_NAME = "scd4x"
+LOG_FIELDS = (
+    ("co2", "H"),
+    ("temp", "h"),
+    ("humidity", "B")
+)
+
+# Sensor Constants
+CO2_THRESHOLD = 1000
+SAMPLE_MARGIN = 0.05  # Wake this long after a sample is expected
+SAMPLE_RETRY = 0.02  # Check this often if a sample is late
+SAMPLE_LEAD = 0.01  # Move the estimate this much earlier after each on-time sample
+HISTORY_SIZE = 720  # How many readings to keep (an hour at the standard rate)
+
+# Acquisition Mode Constants
+# "periodic", "low_power", "single_shot", or "auto" to let plan_acquisition()
+# pick the lowest power mode that still updates every MAX_UPDATE_LATENCY seconds
+ACQUISITION_MODE = "auto"
+MAX_UPDATE_LATENCY = 5
+SINGLE_SHOT_SUPPORTED = False  # Single-shot measurements need an SCD41, not an SCD40
+# Seconds between samples and approximate average current (mA at 3.3V) from
+# the SCD4x datasheet for each periodic mode
+PERIODIC_MODES = {
+    "periodic": (5, 15.0),
+    "low_power": (30, 3.2)
+}
+SINGLE_SHOT_TIME = 5  # A single-shot measurement is ready 5 seconds after it's started
+SINGLE_SHOT_CHARGE = 90  # Approximate mA*s used by one single-shot measurement
+IDLE_CURRENT = 0.15  # Approximate mA drawn between single-shot measurements
+
+def plan_acquisition(latency):
+    """Pick the lowest-current mode that gives a reading at least every latency seconds.
+
+    Returns (mode, seconds between samples, average mA). If no mode is fast
+    enough, standard periodic measurement is the fastest there is.
+    """
+    interval, current = PERIODIC_MODES["periodic"]
+    plan = ("periodic", interval, current)
+    for mode, (interval, current) in PERIODIC_MODES.items():
+        if interval <= latency and current < plan[2]:
+            plan = (mode, interval, current)
+    if SINGLE_SHOT_SUPPORTED and latency >= SINGLE_SHOT_TIME:
+        # Single shots spread their cost over however long we're allowed to wait
+        current = IDLE_CURRENT + SINGLE_SHOT_CHARGE / latency
+        if current < plan[2]:
+            plan = ("single_shot", latency, current)
+    return plan
+
+# Choose how the sensor measures
+if ACQUISITION_MODE == "auto":
+    acquisition_mode, sample_interval, average_current = plan_acquisition(MAX_UPDATE_LATENCY)
+elif ACQUISITION_MODE == "single_shot":
+    acquisition_mode, sample_interval = "single_shot", MAX_UPDATE_LATENCY
+    average_current = IDLE_CURRENT + SINGLE_SHOT_CHARGE / sample_interval
+else:
+    acquisition_mode = ACQUISITION_MODE
+    sample_interval, average_current = PERIODIC_MODES[acquisition_mode]
+reading_interval = sample_interval  # Seconds between readings, for the chart
+
+# Reading history with rolling 1 hour and 24 hour stats, see history.py
+history = {
+    "co2": Channel('H', HISTORY_SIZE, sample_interval, threshold=CO2_THRESHOLD),
+    "temp": Channel('h', HISTORY_SIZE, sample_interval),
+    "humidity": Channel('b', HISTORY_SIZE, sample_interval)
+}
+
+# Latest reading, handed from sensor_task() to app.py's display_task()
+reading = {
+    "co2": None,
+    "temp": None,
+    "humidity": None
+}
+new_reading = asyncio.Event()
+
+# Values last drawn by update_labels()
+prev_values = {
+    "temp": None,
+    "humidity": None
+}
+
+scd4x = None
+measurement_started = None
+
+def setup(i2c, addresses):
+    """Start the sensor measuring in the chosen acquisition mode."""
+    global scd4x, measurement_started
+    print(f"Acquisition mode: {acquisition_mode}, a reading every {sample_interval}s, about {average_current:.2f}mA")
+    scd4x = adafruit_scd4x.SCD4X(i2c)
+    print("Serial number:", [hex(i) for i in scd4x.serial_number])
+    if acquisition_mode == "periodic":
+        scd4x.start_periodic_measurement()
+    elif acquisition_mode == "low_power":
+        scd4x.start_low_periodic_measurement()
+    # Single-shot measurements are started by sensor_task() as they're needed
+    measurement_started = time.monotonic_ns()
+
+def start_single_shot():
+    """Start one measurement without waiting for it.
+
+    The driver's measure_single_shot() blocks for the full 5 seconds, which
+    would stall every other task.
+    """
+    scd4x._send_command(0x219D, cmd_delay=0)
+
+# Display functions
+def show_loading(labels):
+    labels["temp"].text = "..."
+    labels["humidity"].text = "..."
+
+def spin(labels, char):
+    labels["temp"].text = char
+    labels["humidity"].text = char
+
+def update_labels(labels):
+    """Update the temperature and humidity labels if they've changed"""
+    temp = reading["temp"]
+    humidity = reading["humidity"]
+    if prev_values["temp"] != temp:
+        labels["temp"].text = f"{temp}°F"
+
+    if prev_values["humidity"] != humidity:
+        labels["humidity"].text = f"{humidity}%"
+
+    prev_values.update({
+        "temp": temp,
+        "humidity": humidity
+    })
+
+class SampleClock:
+    """Predicts when the SCD4x will have its next sample ready.
+
+    In the periodic modes the first sample is due one interval after the
+    measurement is started and each one after that an interval later. In
+    single-shot mode, sensor_task() starts each measurement SINGLE_SHOT_TIME
+    before it's due. The sensor's clock drifts
+    against ours, so the estimate creeps SAMPLE_LEAD earlier every time a
+    sample is already waiting, and snaps to the real ready time whenever one
+    turns out to be late. That keeps wake-ups just behind the sensor.
+    """
+    def __init__(self, first_due, interval):
+        self.period = int(interval * 1_000_000_000)
+        self.margin = int(SAMPLE_MARGIN * 1_000_000_000)
+        self.lead = int(SAMPLE_LEAD * 1_000_000_000)
+        self.due = first_due
+
+    def wake_time(self):
+        return self.due + self.margin
+
+    def advance(self, now, on_time):
+        if on_time:
+            # Ready some time before we looked - try a little earlier
+            self.due += self.period - self.lead
+        else:
+            # Became ready between the last two polls
+            self.due = now + self.period
+        # Don't schedule wake-ups in the past after a long stall
+        while self.due + self.margin < now:
+            self.due += self.period
+
+def read_sample():
+    """Read CO2, temperature and humidity in a single transfer.
+
+    The driver's CO2, temperature and relative_humidity properties each poll
+    data_ready again before returning, so once we know a sample is waiting
+    read it directly.
+    """
+    scd4x._read_data()
+    return scd4x._co2, scd4x._temperature, scd4x._relative_humidity
+
+async def sensor_task():
+    """Read each sample just after the sensor makes it ready."""
+    single_shot = acquisition_mode == "single_shot"
+    shot_time = int(SINGLE_SHOT_TIME * 1_000_000_000)
+    if single_shot:
+        first_due = measurement_started + shot_time
+    else:
+        first_due = measurement_started + int(sample_interval * 1_000_000_000)
+    clock = SampleClock(first_due, sample_interval)
+    max_polls = int(sample_interval / SAMPLE_RETRY)
+    first_sample = True
+    while True:
+        if single_shot:
+            await sleep_until(clock.due - shot_time)
+            try:
+                start_single_shot()
+            except Exception as e:
+                print(f"Error reading sensor: {e}")
+        await sleep_until(clock.wake_time())
+        polls = 1
+        try:
+            # Normally one check; only retry if the sensor is running behind
+            ready = scd4x.data_ready
+            while not ready and polls < max_polls:
+                await asyncio.sleep(SAMPLE_RETRY)
+                polls += 1
+                ready = scd4x.data_ready
+
+            if ready:
+                co2, celsius, relative_humidity = read_sample()
+                co2 = int(co2)
+                temp = int((celsius * (9 / 5)) + 32)
+                humidity = int(relative_humidity)
+
+                print(f"CO2: {co2}ppm")
+                print(f"Temperature: {temp}°F")
+                print(f"Humidity: {humidity}%\n")
+
+                reading.update({
+                    "co2": co2,
+                    "temp": temp,
+                    "humidity": humidity
+                })
+                new_reading.set()
+                if first_sample:
+                    timeline.mark("first_sample")
+                    first_sample = False
+                history["co2"].add(co2)
+                history["temp"].add(temp)
+                history["humidity"].add(humidity)
+        except Exception as e:
+            print(f"Error reading sensor: {e}")
+        clock.advance(time.monotonic_ns(), polls == 1)
+
+def tasks():
+    """The tasks this sensor needs, for app.py's main()"""
+    return [sensor_task()]
+
+def report():
+    """Print this sensor's stats, called every STATS_INTERVAL"""
+    history["co2"].report("co2", "ppm")
+    history["temp"].report("temp", "°F")
+    history["humidity"].report("humidity", "%")
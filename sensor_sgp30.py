@@ -0,0 +1,493 @@
+# SGP30 support for the CO2 sensor app
+# Copy this file to the CIRCUITPY drive next to code.py
+#
+# app.py imports this when it finds an Adafruit SGP30 on the STEMMA QT
+# connector. The SGP30 only gives an approximate eCO2 and a VOC reading, and
+# needs a saved baseline to read well after a reboot.
+
+import board, time, digitalio
+import asyncio
+import adafruit_sgp30
+import storage, supervisor, microcontroller
+from history import Channel
+from journal import Journal, FileStore, NvmStore
+import nvm_layout
+from boot_timeline import timeline
+from ticker import Ticker, sleep_until
+
+# Display Constants
+# Labels shown under the CO2 value: (name, x, y, scale)
+LABELS = (
+    ("voc_status", 52, 76, 2),
+    ("voc", 52, 100, 3)
+)
+
+# Logging Constants
+# Fields app.py logs to the microSD card and sends over USB each reading:
+# (name, struct format). See sdlog.py and telemetry.py
+LOG_NAME = "sgp30"
+LOG_FIELDS = (
+    ("co2", "H"),
+    ("voc", "H")
+)
+
+# Sensor and Timing Constants
+CO2_THRESHOLD = 1000
+VOC_THRESHOLD = 660
+UPDATE_INTERVAL = 4  # How often a new averaged reading is shown
+MEASURE_INTERVAL = 1  # The SGP30's baseline compensation expects a measurement every second
+WARMUP_TIME = 15
+CALIBRATION_TIME = 12 * 3600
+BASELINE_MAX_AGE = 7 * 24 * 3600  # The SGP30 datasheet says a baseline is good for a week
+CLOCK_SET_YEAR = 2024  # A clock showing an earlier year was never set
+BASELINE_SAVE_INTERVAL = 3600
+# Where the baseline is kept: "nvm" is microcontroller.nvm, which works even
+# when connected to a computer. "file" is BASELINE_FILE on CIRCUITPY, which
+# also needs DEVICE_WRITES set to True in boot.py.
+BASELINE_STORAGE = "nvm"
+BASELINE_FILE = "sgp30_baseline.bin"
+BASELINE_SLOTS = 16  # Baseline records kept, each save overwrites the oldest
+NVM_WRITE_INTERVAL = 6 * 3600  # Most often the baseline is written to nvm
+# Humidity Compensation Constants
+# An SCD4x or SHT4x on the same STEMMA QT chain is used to keep the SGP30's
+# humidity compensation up to date
+SCD4X_ADDRESS = 0x62
+SHT4X_ADDRESS = 0x44
+HUMIDITY_INTERVAL = 5  # How often to read temperature and humidity
+AH_CHANGE = 32  # Only update the SGP30 if absolute humidity moves 32/256 g/m3
+# Saturation vapor pressure in Pa every 2C from -10C to 50C (Magnus formula)
+SATURATION_MIN = -10
+SATURATION_STEP = 2
+SATURATION_PRESSURE = (287, 336, 391, 455, 528, 611, 706, 813, 934, 1071, 1226,
+                       1400, 1595, 1814, 2059, 2333, 2637, 2977, 3353, 3771, 4234,
+                       4745, 5309, 5931, 6616, 7367, 8192, 9096, 10085, 11166, 12345)
+
+USB_DETECT_TIMEOUT = 3  # How long USB can take to register with a computer
+USB_POLL_INTERVAL = 0.1
+HISTORY_SIZE = 900  # How many readings to keep (an hour at UPDATE_INTERVAL)
+reading_interval = UPDATE_INTERVAL  # Seconds between readings, for the chart
+
+# Task Timing Constants
+LED_INTERVAL = 0.5  # LED blinks at this rate during warmup
+
+# Color Constants
+COLOR_GREEN = 0x00FF00
+COLOR_RED = 0xFF0000
+
+# GLOBAL VARIABLES
+start_time = None
+files_writable = False  # Whether code.py can write to CIRCUITPY, see storage_task()
+calibration_restored = 0  # Seconds of calibration the stored baseline had
+baseline_loaded = asyncio.Event()
+prev_values = {
+    "voc": None
+}
+sgp30 = None
+led = None
+humidity_kind = None
+humidity_sensor = None
+baseline_journal = None
+
+# FUNCTION DEFINITIONS
+def setup(i2c, addresses):
+    """Start the SGP30 and find a sensor for its humidity compensation.
+
+    addresses is what app.py's I2C scan found. storage_task() loads the
+    stored baseline once it knows about USB.
+    """
+    global sgp30, led, humidity_kind, humidity_sensor, baseline_journal
+
+    # Setup LED
+    led = digitalio.DigitalInOut(board.A0)
+    led.direction = digitalio.Direction.OUTPUT
+    led.value = False
+
+    sgp30 = adafruit_sgp30.Adafruit_SGP30(i2c)
+    initialize_baseline_tracking()  # Warmup is timed from iaq_init() in the line above
+    print("Serial number:", [hex(i) for i in sgp30.serial])
+    baseline_journal = open_baseline_journal()
+    humidity_kind, humidity_sensor = find_humidity_sensor(i2c, addresses)
+    if humidity_sensor:
+        print(f"Humidity compensation from {humidity_kind}")
+    else:
+        # Nothing to measure the room with, so assume a typical one
+        sgp30.set_iaq_relative_humidity(celsius=22.1, relative_humidity=44)
+
+# Baseline management functions
+def open_baseline_journal():
+    """The journal the baseline is saved in, in nvm if the board has room.
+
+    Records are eCO2 baseline, TVOC baseline, clock_time() when saved and
+    calibration_seconds() when saved. See journal.py.
+    """
+    store = None
+    if BASELINE_STORAGE == "nvm":
+        try:
+            store = NvmStore(nvm_layout.BASELINE, nvm_layout.BASELINE_SIZE, NVM_WRITE_INTERVAL)
+        except ValueError as e:
+            print(f"Saving the baseline to {BASELINE_FILE} instead of nvm: {e}")
+    if store is None:
+        store = FileStore(BASELINE_FILE)
+    return Journal(store, "HHII", version=2, slots=BASELINE_SLOTS)
+
+def initialize_baseline_tracking():
+    """Start tracking baseline timing"""
+    global start_time
+    start_time = time.monotonic()
+
+def clock_time():
+    """time.time() if the board's clock has been set, otherwise 0"""
+    now = int(time.time())
+    return now if time.localtime(now)[0] >= CLOCK_SET_YEAR else 0
+
+def calibration_seconds():
+    """How long the sensor has been calibrating, counting the restored baseline's time"""
+    return calibration_restored + time.monotonic() - start_time
+
+def load_baseline(sensor):
+    """Load saved baseline values if available and less than BASELINE_MAX_AGE old.
+
+    The calibration clock carries on from the saved baseline's, so a board
+    that was fully calibrated before it restarted still is.
+    """
+    global calibration_restored
+    baseline = baseline_journal.load()
+    if baseline is None:
+        print("No stored baseline found - starting fresh calibration")
+        return False
+
+    eco2, tvoc, saved_at, calibrated = baseline
+    now = clock_time()
+    if now and saved_at:
+        if now - saved_at > BASELINE_MAX_AGE:
+            print(f"Stored baseline is {(now - saved_at) // 86400} days old - starting fresh calibration")
+            return False
+    else:
+        print("The board's clock isn't set, so the stored baseline's age can't be checked")
+
+    sensor.set_iaq_baseline(eco2, tvoc)
+    calibration_restored = calibrated
+    print("Loaded stored baseline values:")
+    print(f"eCO2: 0x{eco2:x}, TVOC: 0x{tvoc:x}, calibrated for {calibrated // 3600}h")
+    return True
+
+def save_baseline(sensor):
+    """Save current baseline values"""
+    if baseline_journal.store.on_filesystem and not files_writable:
+        print("CIRCUITPY is read-only - can't save baseline")
+        return
+
+    # Only save if we're past initial calibration
+    calibrated = int(calibration_seconds())
+    if calibrated > CALIBRATION_TIME:
+        try:
+            if baseline_journal.save(sensor.baseline_eCO2, sensor.baseline_TVOC, clock_time(), calibrated):
+                print("Saved new baseline values")
+        except OSError as e:
+            if e.args[0] == 30:  # Read-only filesystem
+                print("Could not save baseline - filesystem is read-only")
+            else:
+                print(f"Error saving baseline: {e}")
+
+def check_warmup_status():
+    """Check if sensor is warmed up"""
+    elapsed = time.monotonic() - start_time
+    return {
+        'warmed_up': elapsed > WARMUP_TIME,
+        'elapsed_time': elapsed
+    }
+
+# Humidity compensation functions
+def absolute_humidity(centi_celsius, centi_rh):
+    """Absolute humidity in 1/256 g/m3, the SGP30's 8.8 fixed-point format.
+
+    Takes hundredths of a degree C and of a percent RH and uses only
+    integer math. Every intermediate value fits in a CircuitPython small
+    int, so nothing is allocated.
+    """
+    # Clamp to the table once, so the pressure and the Kelvin below agree
+    step = SATURATION_STEP * 100
+    lowest = SATURATION_MIN * 100
+    highest = lowest + step * (len(SATURATION_PRESSURE) - 1) - 1
+    centi_celsius = min(max(centi_celsius, lowest), highest)
+
+    # Saturation vapor pressure, interpolated from the table
+    offset = centi_celsius - lowest
+    index = offset // step
+    low = SATURATION_PRESSURE[index]
+    high = SATURATION_PRESSURE[index + 1]
+    saturation = low + (high - low) * (offset - index * step) // step
+
+    # Vapor pressure in Pa, then AH = 2.167 * Pa / Kelvin, times 256
+    vapor = saturation * centi_rh // 10000
+    return max(1, min(0xFFFF, vapor * 55470 // (centi_celsius + 27315)))
+
+def find_humidity_sensor(i2c, addresses):
+    """Look for a temperature/humidity sensor next to the SGP30.
+
+    Returns (kind, sensor) or (None, None). Only the driver for the sensor
+    that's found is imported.
+    """
+    if SCD4X_ADDRESS in addresses:
+        import adafruit_scd4x
+        scd4x = adafruit_scd4x.SCD4X(i2c)
+        scd4x.start_periodic_measurement()
+        return "scd4x", scd4x
+    if SHT4X_ADDRESS in addresses:
+        import adafruit_sht4x
+        return "sht4x", adafruit_sht4x.SHT4x(i2c)
+    return None, None
+
+# Display functions
+def show_loading(labels):
+    labels["voc_status"].text = ""
+    labels["voc"].text = ""
+
+def spin(labels, char):
+    labels["voc"].text = char
+
+def update_labels(labels):
+    """Update the VOC labels if the VOC reading has changed"""
+    voc = reading["voc"]
+    if prev_values["voc"] != voc:
+        labels["voc_status"].text = "VOC:"
+        labels["voc_status"].color = COLOR_GREEN if voc < VOC_THRESHOLD else COLOR_RED
+        labels["voc"].text = f"{voc}"
+    prev_values["voc"] = voc
+
+class MeasureStats:
+    """Timing stats for the 1 Hz measurement clock.
+
+    Jitter is how late each measurement started after its deadline. A
+    missed tick is a deadline that passed entirely while another task held
+    the CPU, so the sensor went more than MEASURE_INTERVAL without a
+    measurement.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.ticks = 0
+        self.missed = 0
+        self.jitter_total = 0
+        self.jitter_max = 0
+
+    def record(self, jitter, missed):
+        self.ticks += 1
+        self.missed += missed
+        self.jitter_total += jitter
+        if jitter > self.jitter_max:
+            self.jitter_max = jitter
+
+    def report(self):
+        if self.ticks:
+            average = self.jitter_total // self.ticks // 1000
+            print(f"Measure timing: {self.ticks} ticks, jitter avg {average}us "
+                  f"max {self.jitter_max // 1000}us, {self.missed} missed")
+        self.reset()
+
+# Latest reading, handed from publish_task() to app.py's display_task()
+# and led_task()
+reading = {
+    "co2": None,
+    "voc": None
+}
+new_reading = asyncio.Event()
+
+# Measurements taken since the last published reading
+pending = {
+    "co2": 0,
+    "voc": 0,
+    "count": 0
+}
+measure_stats = MeasureStats()
+
+# Reading history with rolling 1 hour and 24 hour stats, see history.py
+history = {
+    "co2": Channel('H', HISTORY_SIZE, UPDATE_INTERVAL, threshold=CO2_THRESHOLD),
+    "voc": Channel('H', HISTORY_SIZE, UPDATE_INTERVAL, threshold=VOC_THRESHOLD)
+}
+
+def print_computer_notice():
+    print("Running from computer, so saving files for calibration won't happen.\n"
+          "Be sure DEVICE_WRITES is True in boot.py, then plug into a USB power\n"
+          "source (not a computer) and leave alone for 12 hours in a\n"
+          "well-ventilated area to properly calibrate & save the calibration file.")
+
+async def storage_task():
+    """Find out whether files can be saved, then load the baseline.
+
+    boot.py decides that at reset and records it in nvm, so it's known right
+    away, and a baseline kept in nvm doesn't need files at all. Only without
+    boot.py does this check for a computer and remount the filesystem
+    itself. USB takes a moment to "register with the Mac" after boot, so if
+    you check usb_connected too soon you may not properly register as
+    connected to a computer. Rather than sleeping, this polls for up to
+    USB_DETECT_TIMEOUT seconds while the sensor warms up and the display
+    and fonts get set up.
+    """
+    global files_writable
+    mode = nvm_layout.storage_mode(microcontroller.nvm)
+    if baseline_journal.store.on_filesystem:
+        if mode == nvm_layout.MODE_DEVICE:
+            files_writable = True
+        elif mode == nvm_layout.MODE_USB:
+            print_computer_notice()
+        else:
+            deadline = time.monotonic_ns() + int(USB_DETECT_TIMEOUT * 1_000_000_000)
+            while not supervisor.runtime.usb_connected and time.monotonic_ns() < deadline:
+                await asyncio.sleep(USB_POLL_INTERVAL)
+            timeline.mark("usb_wait")
+
+            # To allow storage when not connected to a computer
+            if supervisor.runtime.usb_connected:
+                print_computer_notice()
+            else:
+                try:
+                    storage.remount("/", False)  # Make filesystem writable when running from USB
+                    files_writable = True
+                except Exception as e:
+                    print(f"Error with storage or file writing: {e}")
+            timeline.mark("storage")
+
+    load_baseline(sgp30)
+    baseline_loaded.set()
+    timeline.mark("baseline")
+
+async def humidity_task():
+    """Keep the SGP30's humidity compensation in step with the room.
+
+    The SGP30 is only told about a new absolute humidity when it has moved
+    by AH_CHANGE, which keeps I2C traffic down.
+    """
+    if humidity_sensor is None:
+        return
+    ticker = Ticker(HUMIDITY_INTERVAL)
+    sent = None
+    while True:
+        await ticker.wait()
+        try:
+            if humidity_kind == "scd4x":
+                if not humidity_sensor.data_ready:
+                    continue
+                # The driver's temperature and relative_humidity properties
+                # each check data_ready again, so read the sample once, like
+                # sensor_scd4x.read_sample()
+                humidity_sensor._read_data()
+                celsius = humidity_sensor._temperature
+                relative_humidity = humidity_sensor._relative_humidity
+            else:
+                celsius, relative_humidity = humidity_sensor.measurements
+            humidity = absolute_humidity(int(celsius * 100), int(relative_humidity * 100))
+            if sent is None or abs(humidity - sent) >= AH_CHANGE:
+                sgp30.set_iaq_humidity(humidity / 256)
+                sent = humidity
+        except Exception as e:
+            print(f"Error reading humidity sensor: {e}")
+
+async def measure_task():
+    """Measure the sensor once a second, on schedule.
+
+    The SGP30 only keeps its baseline compensation up to date if it's
+    measured every second, so this runs independently of how often the
+    display changes. Readings are summed into pending for publish_task().
+    """
+    period = int(MEASURE_INTERVAL * 1_000_000_000)
+    deadline = time.monotonic_ns()
+    while True:
+        await sleep_until(deadline)
+        late = time.monotonic_ns() - deadline
+        missed = late // period
+        measure_stats.record(late - missed * period, missed)
+        # Stay on the original one second grid even after a stall
+        deadline += (missed + 1) * period
+
+        try:
+            # One measurement returns both values. The driver's eCO2 and
+            # TVOC properties would each take a measurement of their own.
+            co2, voc = sgp30.iaq_measure()
+            # Readings during warmup are fixed at 400ppm/0ppb
+            if check_warmup_status()['warmed_up']:
+                pending["co2"] += co2
+                pending["voc"] += voc
+                pending["count"] += 1
+        except Exception as e:
+            print(f"Error reading sensor: {e}")
+
+async def publish_task():
+    """Publish the average of the latest measurements for the display."""
+    # Wait out the warmup
+    await asyncio.sleep(max(0, WARMUP_TIME - check_warmup_status()['elapsed_time']))
+
+    ticker = Ticker(UPDATE_INTERVAL)
+    first_sample = True
+    while True:
+        await ticker.wait()
+        count = pending["count"]
+        if not count:
+            continue
+        co2 = pending["co2"] // count
+        voc = pending["voc"] // count
+        pending.update({
+            "co2": 0,
+            "voc": 0,
+            "count": 0
+        })
+
+        print(f"CO2: {co2}ppm")
+        print(f"VOC: {voc}ppb")
+
+        reading.update({
+            "co2": co2,
+            "voc": voc
+        })
+        new_reading.set()
+        if first_sample:
+            timeline.mark("first_sample")
+            first_sample = False
+        history["co2"].add(co2)
+        history["voc"].add(voc)
+
+async def baseline_task():
+    """Save the baseline every BASELINE_SAVE_INTERVAL once calibrated"""
+    # A restored baseline may already be calibrated
+    await baseline_loaded.wait()
+    await asyncio.sleep(max(0, CALIBRATION_TIME - calibration_seconds()) + 1)
+
+    ticker = Ticker(BASELINE_SAVE_INTERVAL)
+    while True:
+        save_baseline(sgp30)
+        await ticker.wait()
+
+async def led_task():
+    """Blink the LED during warmup, then light it if CO2 or VOC is high"""
+    ticker = Ticker(LED_INTERVAL)
+    while True:
+        if reading["co2"] is None:
+            led.value = not led.value
+        else:
+            # Turn on LED if either CO2 or VOC is high
+            led.value = reading["co2"] >= CO2_THRESHOLD or reading["voc"] >= VOC_THRESHOLD
+            # led.value = reading["co2"] >= CO2_THRESHOLD # LED will turn on when CO2 is high
+        await ticker.wait()
+
+def tasks():
+    """The tasks this sensor needs, for app.py's main()
+
+    Each runs on its own schedule, so a slow baseline write can't delay a
+    measurement.
+    """
+    return [
+        measure_task(),
+        storage_task(),
+        humidity_task(),
+        publish_task(),
+        baseline_task(),
+        led_task()
+    ]
+
+def report():
+    """Print this sensor's stats, called every STATS_INTERVAL"""
+    measure_stats.report()
+    history["co2"].report("co2", "ppm")
+    history["voc"].report("voc", "ppb")
@@ -0,0 +1,116 @@
+# Binary telemetry over USB for the CO2 sensor app
+# Copy this file to the CIRCUITPY drive next to code.py
+#
+# boot.py turns on a second USB serial port, usb_cdc.data, next to the
+# console, so the readings can go to a program on the computer while the
+# console stays free for people. Each frame on it is:
+#
+#   payload, then a CRC32 of it, all COBS encoded, then a 0 byte
+#
+# The payload is FRAME_HEADER (kind, sequence number) followed by
+#   DESCRIPTION  the fields as text like "co2:H,temp:h,humidity:B", the
+#                same as sdlog.py's header
+#   READING      a ">I" time.time(), then the fields
+#
+# COBS takes every 0 byte out of the frame, so a 0 only ever ends one, and
+# a reader that starts mid-stream or loses some bytes picks up again at the
+# next frame. The sequence number goes up by one every frame, sent or not,
+# so a gap shows how many were missed. tools/telemetry_reader.py decodes
+# the stream on the computer.
+
+import time
+import struct
+from binascii import crc32
+
+FRAME_HEADER = ">BH"  # Kind, sequence number
+DESCRIPTION = 1
+READING = 2
+CRC_SIZE = 4
+DESCRIBE_EVERY = 60  # Also resend the description every so many readings
+
+def cobs_encode(data, length, out):
+    """COBS encode data[:length] into out, then a 0. Returns the bytes used in out."""
+    code_offset = 0
+    offset = 1
+    code = 1
+    for i in range(length):
+        byte = data[i]
+        if byte:
+            out[offset] = byte
+            offset += 1
+            code += 1
+        if not byte or code == 0xFF:
+            out[code_offset] = code
+            code_offset = offset
+            offset += 1
+            code = 1
+    out[code_offset] = code
+    out[offset] = 0
+    return offset + 1
+
+class Telemetry:
+    """Sends readings as frames on usb_cdc.data.
+
+    Does nothing if boot.py didn't turn the port on, and skips frames while
+    nothing on the computer has it open, so it never holds up the app. The
+    description goes out again whenever the port is opened, so a reader
+    knows the fields from its first reading. Frames are built in
+    preallocated buffers.
+    """
+    def __init__(self, fields):
+        try:
+            import usb_cdc
+            self.port = usb_cdc.data
+        except ImportError:
+            self.port = None
+        if self.port is not None:
+            self.port.write_timeout = 0  # Drop what doesn't fit rather than wait
+        self.fields = [name for name, _ in fields]
+        self.format = FRAME_HEADER + "I" + "".join(code for _, code in fields)
+        self.description = ",".join(f"{name}:{code}" for name, code in fields).encode()
+        self.reading_size = struct.calcsize(self.format)
+        size = max(self.reading_size, struct.calcsize(FRAME_HEADER) + len(self.description))
+        self.payload = bytearray(size + CRC_SIZE)
+        self.frame = bytearray(len(self.payload) + len(self.payload) // 254 + 2)
+        self.values = [0] * (len(self.fields) + 3)  # Kind, sequence, time, then the fields
+        self.sequence = 0
+        self.readings = 0
+        self.frames_sent = 0
+        self.connected = False
+
+    def _send(self, length):
+        """Add the CRC to the payload's first length bytes and send it as a frame"""
+        self.sequence = (self.sequence + 1) & 0xFFFF
+        if not self.port.connected:
+            return
+        struct.pack_into(">I", self.payload, length, crc32(memoryview(self.payload)[:length]))
+        size = cobs_encode(self.payload, length + CRC_SIZE, self.frame)
+        self.port.write(memoryview(self.frame)[:size])
+        self.frames_sent += 1
+
+    def describe(self):
+        """Send the field names and formats"""
+        if self.port is None:
+            return
+        struct.pack_into(FRAME_HEADER, self.payload, 0, DESCRIPTION, self.sequence)
+        start = struct.calcsize(FRAME_HEADER)
+        self.payload[start:start + len(self.description)] = self.description
+        self._send(start + len(self.description))
+
+    def send(self, reading):
+        """Send the fields of a reading dict"""
+        if self.port is None:
+            return
+        connected = self.port.connected
+        if connected and (not self.connected or self.readings % DESCRIBE_EVERY == 0):
+            self.describe()
+        self.connected = connected
+        self.readings += 1
+        values = self.values
+        values[0] = READING
+        values[1] = self.sequence
+        values[2] = int(time.time())
+        for index, name in enumerate(self.fields):
+            values[index + 3] = reading[name]
+        struct.pack_into(self.format, self.payload, 0, *values)
+        self._send(self.reading_size)
@@ -0,0 +1,120 @@
+# Tests for delta.py, run on your computer:
+#
+#     python3 -m unittest discover tests
+
+import os
+import random
+import struct
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import delta
+
+# The record formats the sensors log, see LOG_FIELDS in the sensor files
+SCD4X_FORMAT = ">IHhB"
+SGP30_FORMAT = ">IHH"
+
+
+def limits(code):
+    """The smallest and largest value of a struct format code"""
+    size = struct.calcsize(">" + code)
+    if code.isupper():
+        return 0, (1 << (8 * size)) - 1
+    return -(1 << (8 * size - 1)), (1 << (8 * size - 1)) - 1
+
+
+def encode_chunks(record_format, records, size=512):
+    """Encode records into as many chunks of size bytes as they need.
+
+    Returns [(chunk, count), ...].
+    """
+    chunks = []
+    buffer = bytearray(size)
+    encoder = delta.DeltaEncoder(record_format, buffer)
+    for values in records:
+        encoder.add(values)
+        if not encoder.room():
+            chunks.append((bytes(buffer), encoder.count))
+            buffer[:] = bytes(size)
+            encoder.reset()
+    if encoder.count:
+        chunks.append((bytes(buffer), encoder.count))
+    return chunks
+
+
+def decode_chunks(record_format, chunks):
+    records = []
+    for chunk, count in chunks:
+        records += delta.decode(record_format, chunk, 0, count)
+    return records
+
+
+class ZigzagTest(unittest.TestCase):
+    def test_small_values_stay_small(self):
+        self.assertEqual([delta.zigzag(n) for n in (0, -1, 1, -2, 2)], [0, 1, 2, 3, 4])
+
+    def test_round_trip(self):
+        for n in (0, 1, -1, 127, -128, 65535, -65535, 2 ** 32 - 1, -(2 ** 32 - 1)):
+            self.assertEqual(delta.unzigzag(delta.zigzag(n)), n)
+
+
+class VarintTest(unittest.TestCase):
+    def test_round_trip(self):
+        buffer = bytearray(delta.VARINT_SIZE)
+        for value in (0, 0x7F, 0x80, 0x3FFF, 0x4000, 2 ** 32 - 1, 2 ** 34):
+            end = delta.put_varint(buffer, 0, value)
+            self.assertLessEqual(end, delta.VARINT_SIZE)
+            self.assertEqual(delta.get_varint(buffer, 0), (value, end))
+
+
+class DeltaEncoderTest(unittest.TestCase):
+    def check(self, record_format, records):
+        chunks = encode_chunks(record_format, records)
+        self.assertEqual(decode_chunks(record_format, chunks), [tuple(r) for r in records])
+
+    def test_steady_readings_take_a_byte(self):
+        records = [(1000 + 5 * i, 800, 21, 45) for i in range(100)]
+        chunks = encode_chunks(SCD4X_FORMAT, records, size=4096)
+        self.assertEqual(len(chunks), 1)
+        buffer = bytearray(4096)
+        encoder = delta.DeltaEncoder(SCD4X_FORMAT, buffer)
+        for values in records:
+            encoder.add(values)
+        # The keyframe, a mask and a varint for the first step, then just
+        # a mask byte for each of the rest
+        self.assertEqual(encoder.offset, struct.calcsize(SCD4X_FORMAT) + 2 + (len(records) - 2))
+        self.check(SCD4X_FORMAT, records)
+
+    def test_extremes(self):
+        # Every value jumps between the ends of its range, and the time
+        # jumps both ways, so each delta is as big as it gets
+        for record_format in (SCD4X_FORMAT, SGP30_FORMAT):
+            ranges = [limits(code) for code in record_format[2:]]
+            records = []
+            for i in range(300):
+                records.append([(0, 2 ** 32 - 1)[i % 2]] + [r[(i // 2) % 2] for r in ranges])
+            self.check(record_format, records)
+
+    def test_random_records(self):
+        rng = random.Random(1)
+        for record_format in (SCD4X_FORMAT, SGP30_FORMAT):
+            ranges = [limits(code) for code in record_format[2:]]
+            now = 1_700_000_000
+            records = []
+            for _ in range(5000):
+                now += rng.choice((5, 5, 5, 4, 6, 60, -3600))
+                records.append([now] + [rng.randint(low, high) if rng.random() < 0.1
+                                        else (low + high) // 2 for low, high in ranges])
+            self.check(record_format, records)
+
+    def test_too_many_fields(self):
+        with self.assertRaises(ValueError):
+            delta.DeltaEncoder(">I" + "H" * delta.MAX_VALUES, bytearray(512))
+
+    def test_empty_chunk(self):
+        self.assertEqual(list(delta.decode(SGP30_FORMAT, bytes(512), 0, 0)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
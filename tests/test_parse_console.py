@@ -0,0 +1,101 @@
+# Tests for tools/parse_console.py, run on your computer:
+#
+#     python3 -m unittest discover tests
+#
+# Skipped without NumPy.
+
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools"))
+import parse_console
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+LOG = (
+    "Serial number: ['0x1', '0x2']\n"
+    "CO2: 812ppm\n"
+    "Temperature: 71°F\n"
+    "Humidity: 45%\n"
+    "\n"
+    "CO2: 900ppm\n"
+    "Error reading sensor: timeout\n"
+    "Temperature: -4°F\n"
+    "Humidity: 100%\n"
+    "\n"
+    "CO2: 950ppm\n"  # Missing its humidity
+    "Temperature: 70°F\n"
+    "CO2: 400ppm\n"
+    "VOC: 0ppb\n"
+    "Saved new baseline values\n"
+    "CO2: 60000ppm\n"
+    "VOC: 60000ppb\n"
+).encode()
+
+
+def collect(batches):
+    """{sensor: [row tuples]} from parse()'s batches"""
+    rows = {}
+    for sensor, readings in batches:
+        rows.setdefault(sensor, []).extend(tuple(int(v) for v in row) for row in readings)
+    return rows
+
+
+@unittest.skipIf(numpy is None, "needs NumPy")
+class ParseConsoleTest(unittest.TestCase):
+    def parse(self, data, chunk_size=parse_console.CHUNK_SIZE):
+        parser = parse_console.ConsoleParser()
+        rows = collect(parse_console.parse(io.BytesIO(data), chunk_size, parser))
+        return parser, rows
+
+    def test_readings(self):
+        parser, rows = self.parse(LOG)
+        offset = LOG.index
+        self.assertEqual(rows["scd4x"], [
+            (offset(b"CO2: 812"), 812, 71, 45),
+            (offset(b"CO2: 900"), 900, -4, 100),
+        ])
+        self.assertEqual(rows["sgp30"], [
+            (offset(b"CO2: 400"), 400, 0),
+            (offset(b"CO2: 60000"), 60000, 60000),
+        ])
+        self.assertEqual(parser.readings, 4)
+        self.assertEqual(parser.dropped, 1)
+        self.assertEqual(parser.errors, 1)
+
+    def test_batches_are_numpy_arrays(self):
+        for sensor, readings in parse_console.parse(io.BytesIO(LOG)):
+            self.assertEqual(readings.dtype, numpy.dtype(parse_console.DTYPES[sensor]))
+
+    def test_any_chunk_size(self):
+        _, expected = self.parse(LOG)
+        for chunk_size in (1, 2, 3, 7, 50):
+            parser, rows = self.parse(LOG, chunk_size)
+            self.assertEqual(rows, expected)
+            self.assertEqual((parser.readings, parser.dropped, parser.errors), (4, 1, 1))
+            self.assertEqual(parser.offset, len(LOG))
+
+    def test_crlf_and_latin1(self):
+        data = b"CO2: 812ppm\r\nTemperature: 71\xb0F\r\nHumidity: 45%\r\n\r\n"
+        _, rows = self.parse(data)
+        self.assertEqual(rows["scd4x"], [(0, 812, 71, 45)])
+
+    def test_last_line_without_newline(self):
+        _, rows = self.parse(b"CO2: 812ppm\nVOC: 45ppb")
+        self.assertEqual(rows["sgp30"], [(0, 812, 45)])
+
+    def test_cut_off_lines(self):
+        # Output from before the parser was connected, and a line cut short
+        data = b"ature: 71\xc2\xb0F\nHumidity: 45%\nCO2: 81\nCO2: 500ppm\nVOC: 4ppb\n"
+        parser, rows = self.parse(data)
+        self.assertEqual(rows, {"sgp30": [(data.index(b"CO2: 500"), 500, 4)]})
+        self.assertEqual(parser.dropped, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,231 @@
+# Tests for sdlog.py's log and index, run on your computer:
+#
+#     python3 -m unittest discover tests
+
+import os
+import struct
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sdlog
+
+FIELDS = (("co2", "H"), ("temp", "h"), ("humidity", "B"))
+START = 1_700_000_000
+INTERVAL = 5
+
+
+class LogTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, "scd4x.log")
+        self.records = []
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def open_log(self, fields=FIELDS):
+        log = sdlog.BlockLog(self.path, fields)
+        self.addCleanup(log.index.close)
+        self.addCleanup(log.file.close)
+        return log
+
+    def write(self, log, count, start=None):
+        """Log count readings, INTERVAL seconds apart.
+
+        They carry on from the last ones, or start at start if it's given.
+        """
+        for i in range(count):
+            n = len(self.records)
+            when = START + INTERVAL * n if start is None else start + INTERVAL * i
+            reading = {"co2": 400 + n % 2000, "temp": n % 256 - 128, "humidity": n % 101}
+            with mock.patch("time.time", return_value=when):
+                log.add(reading)
+            self.records.append((when, reading["co2"], reading["temp"], reading["humidity"]))
+
+    def index_entries(self):
+        with open(sdlog.index_path(self.path), "rb") as f:
+            data = f.read()
+        return [struct.unpack_from(sdlog.INDEX_ENTRY, data, offset)
+                for offset in range(0, len(data) - sdlog.INDEX_ENTRY_SIZE + 1, sdlog.INDEX_ENTRY_SIZE)]
+
+    def check_index(self, log):
+        """An entry for each block with records, pointing at that block.
+
+        A block starting earlier than the last record before it starts the
+        next segment.
+        """
+        expected = []
+        segment = 0
+        last = None
+        with open(self.path, "rb") as f:
+            for offset in range(sdlog.BLOCK_SIZE, log.size, sdlog.BLOCK_SIZE):
+                f.seek(offset)
+                records = list(sdlog.read_block(f.read(sdlog.BLOCK_SIZE), log.format))
+                if records:
+                    if last is not None and records[0][0] < last:
+                        segment += 1
+                    expected.append((records[0][0], offset, segment))
+                    last = records[-1][0]
+        self.assertEqual(self.index_entries(), expected)
+
+    def restart(self, log):
+        """Close the log and open it again, like the board restarting"""
+        log.flush()
+        log.file.close()
+        log.index.close()
+        return self.open_log()
+
+    def check_range(self, start, end):
+        expected = [r for r in self.records if start <= r[0] < end]
+        self.assertEqual(list(sdlog.read_range(self.path, start, end)), expected)
+
+    def test_round_trip(self):
+        log = self.open_log()
+        self.write(log, 2000)
+        log.flush()
+        self.assertEqual(log.records_written, 2000)
+        self.assertGreater(log.blocks_written, 5)
+        self.check_index(log)
+        self.check_range(0, 2 ** 32)
+        for start in (START, START + 1234, START + 5000, START + 9999):
+            self.check_range(start, start + 600)
+
+    def test_unwritten_block_is_read_too(self):
+        log = self.open_log()
+        self.write(log, 500)
+        self.assertLess(log.records_written, 500)
+        self.assertEqual(list(log.read_range(0, 2 ** 32)), self.records)
+
+    def test_index_cut_mid_entry_is_rebuilt(self):
+        log = self.open_log()
+        self.write(log, 2000)
+        log.flush()
+        log.file.close()
+        log.index.close()
+        index = sdlog.index_path(self.path)
+        os.truncate(index, os.stat(index).st_size - 3)
+
+        log = self.open_log()
+        self.check_index(log)
+        self.check_range(START + 3000, START + 4000)
+
+    def test_missing_entries_are_added(self):
+        log = self.open_log()
+        self.write(log, 2000)
+        log.flush()
+        log.file.close()
+        log.index.close()
+        index = sdlog.index_path(self.path)
+        os.truncate(index, 2 * sdlog.INDEX_ENTRY_SIZE)
+
+        log = self.open_log()
+        self.check_index(log)
+        self.write(log, 1000)
+        log.flush()
+        self.check_index(log)
+        self.check_range(0, 2 ** 32)
+
+    def test_index_from_a_longer_log_is_rebuilt(self):
+        log = self.open_log()
+        self.write(log, 2000)
+        log.flush()
+        log.file.close()
+        log.index.close()
+        # Lose the last blocks of the log but not their index entries
+        os.truncate(self.path, 3 * sdlog.BLOCK_SIZE)
+
+        log = self.open_log()
+        self.check_index(log)
+
+    def test_log_cut_mid_block(self):
+        log = self.open_log()
+        self.write(log, 2000)
+        log.flush()
+        log.file.close()
+        log.index.close()
+        # Power lost while writing the last block, before its index entry
+        blocks = os.stat(self.path).st_size // sdlog.BLOCK_SIZE
+        os.truncate(self.path, (blocks - 1) * sdlog.BLOCK_SIZE + 100)
+        index = sdlog.index_path(self.path)
+        os.truncate(index, os.stat(index).st_size - sdlog.INDEX_ENTRY_SIZE)
+
+        # The cut block is blanked out and new blocks start after it
+        log = self.open_log()
+        self.assertEqual(log.size, blocks * sdlog.BLOCK_SIZE)
+        kept = list(sdlog.read_range(self.path, 0, 2 ** 32))
+        self.assertEqual(kept, self.records[:len(kept)])
+        self.records = kept
+        self.write(log, 300)
+        log.flush()
+        self.check_index(log)
+        self.check_range(0, 2 ** 32)
+
+    def test_header_cut_short(self):
+        log = self.open_log()
+        log.file.close()
+        log.index.close()
+        os.truncate(self.path, 100)
+
+        log = self.open_log()
+        self.write(log, 300)
+        log.flush()
+        self.check_range(0, 2 ** 32)
+
+    def test_other_fields_start_a_new_log(self):
+        log = self.open_log()
+        self.write(log, 300)
+        log.flush()
+        log.file.close()
+        log.index.close()
+
+        log = self.open_log((("co2", "H"), ("voc", "H")))
+        self.assertEqual(log.size, sdlog.BLOCK_SIZE)
+        self.assertTrue(os.path.exists(self.path + ".old"))
+        self.assertTrue(os.path.exists(sdlog.index_path(self.path + ".old")))
+        self.assertEqual(self.index_entries(), [])
+
+    def test_clock_going_back_starts_a_segment(self):
+        log = self.open_log()
+        self.write(log, 600)
+        log.flush()
+        # Blocks with earlier times, like after the clock was set back
+        self.write(log, 600, START - 10 ** 6)
+        log.flush()
+        self.check_index(log)
+        self.assertEqual(self.index_entries()[-1][2], 1)
+        self.check_range(0, 2 ** 32)
+        self.check_range(START - 10 ** 6 + 1000, START + 1000)
+
+    def test_restart_with_the_clock_reset(self):
+        # With no clock that keeps time while it's off, the board's time
+        # starts from the same place after every restart
+        log = self.open_log()
+        self.write(log, 3000)
+        log = self.restart(log)
+        self.write(log, 1000, START)
+        log.flush()
+        self.check_index(log)
+        self.assertEqual(len([r for r in self.records if START <= r[0] < START + 3600]), 1440)
+        self.check_range(START, START + 3600)
+        self.check_range(START + 4000, START + 8000)
+        self.check_range(0, 2 ** 32)
+        self.assertEqual(list(sdlog.read_range(self.path, 0, 2 ** 32, segment=1)), self.records[3000:])
+
+    def test_short_runs_between_restarts(self):
+        # Each run is too short to fill a block, so its first time isn't
+        # earlier than the one before's, but its records overlap them
+        log = self.open_log()
+        for run in range(5):
+            self.write(log, 100, START + 100 * run)
+            log = self.restart(log)
+        self.check_index(log)
+        self.assertEqual([segment for _, _, segment in self.index_entries()], [0, 1, 2, 3, 4])
+        for start in (START, START + 450, START + 900):
+            self.check_range(start, start + 300)
+
+
+if __name__ == "__main__":
+    unittest.main()
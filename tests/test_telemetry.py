@@ -0,0 +1,146 @@
+# Tests for telemetry.py and tools/telemetry_reader.py, run on your computer:
+#
+#     python3 -m unittest discover tests
+
+import io
+import os
+import random
+import sys
+import unittest
+from unittest import mock
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root, "tools"))
+sys.path.insert(0, root)
+import telemetry
+from telemetry_reader import TelemetryReader, cobs_decode
+
+FIELDS = (("co2", "H"), ("temp", "h"), ("humidity", "B"))
+
+
+class FakePort:
+    """Stands in for usb_cdc.data"""
+    def __init__(self):
+        self.connected = True
+        self.write_timeout = None
+        self.sent = bytearray()
+
+    def write(self, data):
+        self.sent += data
+
+
+def encode(data):
+    out = bytearray(len(data) + len(data) // 254 + 2)
+    size = telemetry.cobs_encode(data, len(data), out)
+    return bytes(out[:size])
+
+
+class CobsTest(unittest.TestCase):
+    def check(self, data):
+        frame = encode(data)
+        # The most Telemetry makes room for in its frame buffer
+        self.assertLessEqual(len(frame), len(data) + len(data) // 254 + 2)
+        self.assertEqual(frame[-1], 0)
+        self.assertNotIn(0, frame[:-1])
+        self.assertEqual(cobs_decode(frame[:-1]), data)
+
+    def test_run_lengths_around_254(self):
+        # A code byte covers at most 254 data bytes, so runs of non-zero
+        # bytes either side of that need an extra code byte or don't
+        for length in (0, 1, 253, 254, 255, 256, 508, 509, 600):
+            for fill in (b"\x01", b"\xff"):
+                data = fill * length
+                self.check(data)
+                self.check(data + b"\0")
+                self.check(b"\0" + data)
+
+    def test_zeros(self):
+        for length in range(0, 10):
+            self.check(bytes(length))
+
+    def test_random(self):
+        rng = random.Random(2)
+        for length in range(0, 600):
+            self.check(bytes(rng.choice((0, 1, 255, rng.randrange(256))) for _ in range(length)))
+
+    def test_bad_frames(self):
+        for frame in (b"\x05ab", b"\x00"):
+            with self.assertRaises(ValueError):
+                cobs_decode(frame)
+
+
+class TelemetryTest(unittest.TestCase):
+    def setUp(self):
+        self.telemetry = telemetry.Telemetry(FIELDS)
+        self.port = FakePort()
+        self.telemetry.port = self.port
+        self.readings = []
+
+    def send(self, count, start=1_700_000_000):
+        for n in range(count):
+            reading = {"co2": 400 + n * 97 % 5000, "temp": n % 256 - 128, "humidity": n % 101}
+            with mock.patch("time.time", return_value=start + 5 * n):
+                self.telemetry.send(reading)
+            if self.port.connected:
+                self.readings.append(dict(reading, time=start + 5 * n))
+
+    def read(self, data):
+        """Decode a stream a few bytes at a time, so frames span reads"""
+        reader = TelemetryReader(io.BytesIO(data), chunk_size=7)
+        return reader, [{name: value for name, value in reading.items() if name != "sequence"}
+                        for reading in reader]
+
+    def test_round_trip(self):
+        self.send(200)
+        reader, readings = self.read(self.port.sent)
+        self.assertEqual(readings, self.readings)
+        self.assertEqual(reader.bad_frames, 0)
+        self.assertEqual(reader.missed, 0)
+        # The description goes out first and then every DESCRIBE_EVERY readings
+        self.assertEqual(reader.frames, 200 + 200 // telemetry.DESCRIBE_EVERY + 1)
+
+    def test_values_at_the_ends_of_their_range(self):
+        for reading in ({"co2": 0, "temp": -32768, "humidity": 0},
+                        {"co2": 65535, "temp": 32767, "humidity": 255}):
+            with mock.patch("time.time", return_value=2 ** 32 - 1):
+                self.telemetry.send(reading)
+            self.readings.append(dict(reading, time=2 ** 32 - 1))
+        self.assertEqual(self.read(self.port.sent)[1], self.readings)
+
+    def test_disconnected_frames_show_as_missed(self):
+        self.send(10)
+        self.port.connected = False
+        self.send(5, start=1_800_000_000)
+        self.port.connected = True
+        self.send(10, start=1_900_000_000)
+        reader, readings = self.read(self.port.sent)
+        self.assertEqual(readings, self.readings)
+        self.assertEqual(reader.missed, 5)
+
+    def test_reader_resyncs_after_damage(self):
+        self.send(20)
+        frames = self.port.sent.split(b"\0")[:-1]
+        # Flip a byte in the 5th frame and cut the 10th short
+        frames[4] = frames[4][:3] + bytes((frames[4][3] ^ 0x55 or 1,)) + frames[4][4:]
+        frames[9] = frames[9][:5]
+        data = b"".join(frame + b"\0" for frame in frames)
+        reader, readings = self.read(data)
+        lost = [self.readings[3], self.readings[8]]  # Frame 0 is the description
+        self.assertEqual(readings, [r for r in self.readings if r not in lost])
+        self.assertEqual(reader.bad_frames, 2)
+
+    def test_reading_before_description(self):
+        self.send(3)
+        first = self.port.sent.index(b"\0") + 1
+        reader, readings = self.read(self.port.sent[first:])
+        self.assertEqual(readings, [])
+        self.assertEqual(reader.undescribed, 3)
+
+    def test_no_port(self):
+        self.telemetry.port = None
+        self.telemetry.send({"co2": 400, "temp": 20, "humidity": 40})
+        self.assertEqual(self.telemetry.frames_sent, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
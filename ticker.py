@@ -0,0 +1,37 @@
+# Task scheduling for the CO2 sensor app
+# Copy this file to the CIRCUITPY drive next to code.py
+
+import time
+import asyncio
+
+async def sleep_until(deadline):
+    """Sleep until time.monotonic_ns() reaches deadline."""
+    delay = deadline - time.monotonic_ns()
+    if delay > 0:
+        await asyncio.sleep(delay / 1_000_000_000)
+    else:
+        await asyncio.sleep(0)
+
+class Ticker:
+    """Fixed-rate schedule for a periodic task.
+
+    wait() sleeps until the next deadline instead of for a fixed interval, so
+    the time a task spends working doesn't push its schedule back. Deadlines
+    are integer nanoseconds because time.monotonic() loses precision once the
+    board has been up for a few hours.
+    """
+    def __init__(self, period):
+        self.deadline = time.monotonic_ns()
+        self.set_period(period)
+
+    def set_period(self, period):
+        self.period_ns = int(period * 1_000_000_000)
+
+    async def wait(self):
+        self.deadline += self.period_ns
+        now = time.monotonic_ns()
+        if self.deadline < now:
+            # Running late - skip the missed deadlines rather than firing
+            # them back to back.
+            self.deadline = now
+        await sleep_until(self.deadline)
@@ -0,0 +1,99 @@
+# Boot timeline reader for the CO2 sensor scripts
+# Runs on your computer, not on the board:
+#
+#     python3 tools/boot_timeline.py serial-log.txt
+#     python3 tools/boot_timeline.py --port /dev/tty.usbmodem1101
+#
+# Finds the "Boot timeline:" lines boot_timeline.py prints, shows how long
+# each phase took, and with --budget exits with an error if the time from
+# power on to the first displayed reading went over it, so it can be used
+# as a regression check.
+
+import argparse
+import statistics
+import sys
+
+REPORT_PREFIX = "Boot timeline:"
+METRIC = "first_frame"
+TICKS_PERIOD = 1 << 29  # supervisor.ticks_ms() wraps around at this, as in boot_timeline.py
+
+
+def parse_line(line):
+    """Return [(phase, ms since power on), ...] from a report line, or None"""
+    start = line.find(REPORT_PREFIX)
+    if start < 0:
+        return None
+    marks = []
+    for item in line[start + len(REPORT_PREFIX):].split():
+        name, _, value = item.partition("=")
+        try:
+            marks.append((name, int(value)))
+        except ValueError:
+            return None
+    return marks
+
+
+def read_timelines(lines):
+    for line in lines:
+        marks = parse_line(line)
+        if marks:
+            yield marks
+
+
+def serial_lines(port, baudrate, count):
+    """Yield lines from the board's console until count timelines have been seen."""
+    try:
+        import serial
+    except ImportError:
+        sys.exit("Reading from a serial port needs pyserial: pip install pyserial")
+    seen = 0
+    with serial.Serial(port, baudrate, timeout=1) as console:
+        while seen < count:
+            line = console.readline().decode("utf-8", "replace")
+            if REPORT_PREFIX in line:
+                seen += 1
+            yield line
+
+
+def print_timeline(marks):
+    previous = 0
+    for name, ticks in marks:
+        duration = (ticks - previous) % TICKS_PERIOD
+        print(f"  {name:<14}{duration:>7}ms  (at {ticks}ms)")
+        previous = ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show boot timelines printed by the CO2 sensor scripts")
+    parser.add_argument("log", nargs="?", help="captured console output (default: stdin)")
+    parser.add_argument("--port", help="read from this serial port instead of a log")
+    parser.add_argument("--baudrate", type=int, default=115200)
+    parser.add_argument("--count", type=int, default=1, help="boots to wait for with --port")
+    parser.add_argument("--budget", type=int, help=f"fail if {METRIC} is later than this many ms")
+    args = parser.parse_args()
+
+    if args.port:
+        lines = serial_lines(args.port, args.baudrate, args.count)
+    elif args.log:
+        lines = open(args.log, encoding="utf-8", errors="replace")
+    else:
+        lines = sys.stdin
+
+    results = []
+    for number, marks in enumerate(read_timelines(lines), 1):
+        print(f"Boot {number}:")
+        print_timeline(marks)
+        first_frame = dict(marks).get(METRIC)
+        if first_frame is not None:
+            results.append(first_frame)
+
+    if not results:
+        sys.exit(f"No boot timelines with {METRIC} found")
+    print(f"Time to first reading: median {statistics.median(results):.0f}ms, "
+          f"min {min(results)}ms, max {max(results)}ms over {len(results)} boots")
+    if args.budget is not None and max(results) > args.budget:
+        sys.exit(f"Over budget: {max(results)}ms > {args.budget}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# Build a CIRCUITPY drive for the CO2 sensor app
+# Runs on your computer, not on the board:
+#
+#     python3 tools/build.py
+#     python3 tools/build.py --out /Volumes/CIRCUITPY
+#
+# Precompiles every module next to code.py to .mpy with mpy-cross and writes
+# them, code.py and the fonts to build/CIRCUITPY (or --out). The board loads
+# .mpy files without compiling them, which saves boot time and the heap the
+# compiler would need alongside displayio and the fonts. Use the mpy-cross
+# that matches your CircuitPython version, from
+# https://adafruit-circuit-python.s3.amazonaws.com/index.html?prefix=bin/mpy-cross/
+#
+# To see what it saves, build with --source once for the plain .py layout,
+# and capture the console from a boot of each. Both print an "Import report:"
+# line, which --compare reads:
+#
+#     python3 tools/build.py --compare source-boot.txt mpy-boot.txt
+#
+# The same modules can also be frozen into a custom CircuitPython build by
+# listing this folder in the board's FROZEN_MPY_DIRS.
+
+import argparse
+import glob
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+
+from subset_fonts import scan_sources
+
+# Run as source: CircuitPython only looks for code.py and boot.py
+ENTRY_POINTS = ("code.py", "boot.py")
+REPORT_PREFIX = "Import report:"
+
+
+def find_modules(root):
+    """The .py files next to code.py that the app imports"""
+    return sorted(path for path in glob.glob(os.path.join(root, "*.py"))
+                  if os.path.basename(path) not in ENTRY_POINTS)
+
+
+def remove_stale(out, name):
+    """Remove old copies of a module, so a stale .py can't shadow a new .mpy."""
+    for extension in (".py", ".mpy"):
+        path = os.path.join(out, name + extension)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def compile_module(mpy_cross, source, target):
+    result = subprocess.run([mpy_cross, "-o", target, source], capture_output=True, text=True)
+    if result.returncode:
+        sys.exit(f"mpy-cross failed on {os.path.basename(source)}:\n{result.stderr}")
+
+
+def copy_fonts(root, out, sources):
+    """Copy the fonts the app loads, as .pcf where subset_fonts.py has made one."""
+    fonts_out = os.path.join(out, "fonts")
+    os.makedirs(fonts_out, exist_ok=True)
+    copied = 0
+    font_names, _ = scan_sources(sources)
+    for name in sorted(font_names):
+        path = os.path.join(root, "fonts", name)
+        if os.path.exists(path[:-4] + ".pcf"):
+            path = path[:-4] + ".pcf"
+        if os.path.exists(path):
+            shutil.copy2(path, fonts_out)
+            copied += os.path.getsize(path)
+    return copied
+
+
+def build(root, out, mpy_cross, source_only):
+    os.makedirs(out, exist_ok=True)
+    if not source_only and shutil.which(mpy_cross) is None:
+        sys.exit(f"Can't find {mpy_cross}. Download the one for your CircuitPython "
+                 "version and pass it with --mpy-cross, or build with --source.")
+
+    modules = find_modules(root)
+    source_total = 0
+    built_total = 0
+    for path in modules:
+        name = os.path.splitext(os.path.basename(path))[0]
+        remove_stale(out, name)
+        if source_only:
+            target = os.path.join(out, name + ".py")
+            shutil.copy2(path, target)
+        else:
+            target = os.path.join(out, name + ".mpy")
+            compile_module(mpy_cross, path, target)
+        source_size = os.path.getsize(path)
+        built_size = os.path.getsize(target)
+        source_total += source_size
+        built_total += built_size
+        print(f"  {os.path.basename(target):<20}{source_size:>8} -> {built_size:>6} bytes")
+
+    for name in ENTRY_POINTS:
+        path = os.path.join(root, name)
+        if os.path.exists(path):
+            shutil.copy2(path, out)
+            print(f"  {name:<20}{os.path.getsize(path):>8} bytes")
+
+    fonts = copy_fonts(root, out, modules)
+    layout = "source" if source_only else ".mpy"
+    print(f"Built the {layout} layout in {out}: modules {source_total} -> {built_total} bytes, "
+          f"fonts {fonts} bytes")
+
+
+def parse_report(line):
+    """Return {"layout": ..., "ms": ..., "heap": ...} from a report line, or None"""
+    start = line.find(REPORT_PREFIX)
+    if start < 0:
+        return None
+    report = {}
+    for item in line[start + len(REPORT_PREFIX):].split():
+        key, _, value = item.partition("=")
+        report[key] = value if key == "layout" else int(value)
+    return report
+
+
+def compare(logs):
+    """Print the median import time and heap for each layout in the logs."""
+    results = {}
+    for log in logs:
+        with open(log, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                try:
+                    report = parse_report(line)
+                except ValueError:
+                    continue
+                if report and "layout" in report:
+                    results.setdefault(report["layout"], []).append(report)
+
+    if not results:
+        sys.exit(f"No '{REPORT_PREFIX}' lines found")
+    medians = {}
+    for layout, reports in sorted(results.items()):
+        ms = statistics.median(report["ms"] for report in reports)
+        heap = statistics.median(report["heap"] for report in reports)
+        medians[layout] = (ms, heap)
+        print(f"{layout:>4}: import {ms:.0f}ms, heap {heap:.0f} bytes over {len(reports)} boots")
+    if "py" in medians and "mpy" in medians:
+        (py_ms, py_heap), (mpy_ms, mpy_heap) = medians["py"], medians["mpy"]
+        print(f"Saved by .mpy: {py_ms - mpy_ms:.0f}ms of import time, {py_heap - mpy_heap:.0f} bytes of heap")
+
+
+def main():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Build a CIRCUITPY drive with the app precompiled to .mpy")
+    parser.add_argument("--out", default=os.path.join(root, "build", "CIRCUITPY"),
+                        help="where to write the files, which can be the CIRCUITPY drive itself")
+    parser.add_argument("--mpy-cross", default="mpy-cross", help="the mpy-cross for your CircuitPython version")
+    parser.add_argument("--source", action="store_true", help="copy the .py files instead of compiling them")
+    parser.add_argument("--compare", nargs="+", metavar="LOG",
+                        help="compare import reports from console logs instead of building")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args.compare)
+    else:
+        build(root, args.out, args.mpy_cross, args.source)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+# Read the readings out of console logs from the CO2 sensor scripts
+# Runs on your computer, not on the board:
+#
+#     python3 tools/parse_console.py serial-log.txt
+#     python3 tools/parse_console.py serial-log.txt --csv readings
+#     python3 tools/parse_console.py --port /dev/tty.usbmodem1101 --csv readings
+#
+# For boards that only print their readings, before telemetry.py. The
+# SCD4x prints each one as three lines and the SGP30 as two:
+#
+#     CO2: 812ppm              CO2: 812ppm
+#     Temperature: 71°F        VOC: 45ppb
+#     Humidity: 45%
+#
+# A reading starts at its CO2 line and ends at the next one. Lines that
+# aren't part of a reading, like "Error reading sensor: ..." or "Saved new
+# baseline values", are skipped wherever they land, and a reading missing
+# a line is dropped. Needs NumPy (pip install numpy): the bytes are split
+# and parsed a chunk at a time with array operations rather than line by
+# line in Python, so it gets through a big log in seconds. The command
+# prints how fast it went.
+#
+# To use it from your own code:
+#
+#     from parse_console import parse
+#     for sensor, readings in parse(open("serial-log.txt", "rb")):
+#         print(sensor, readings["co2"].mean())
+#
+# sensor is "scd4x" or "sgp30", and readings is a NumPy structured array.
+
+import argparse
+import sys
+import time
+
+CHUNK_SIZE = 1 << 18  # Bytes parsed at a time, few enough that the arrays for them stay in cache
+NUMBER_WIDTH = 6  # Most digits a number can have
+WORD = 8  # Bytes read at once, as one little-endian 64 bit word
+
+# Line kinds: (prefix, bytes allowed right after the number)
+CO2, TEMPERATURE, HUMIDITY, VOC = 1, 2, 3, 4
+LINES = {
+    CO2: (b"CO2: ", b"p"),
+    TEMPERATURE: (b"Temperature: ", b"\xc2\xb0"),  # UTF-8 °, or Latin-1 ° from some terminals
+    HUMIDITY: (b"Humidity: ", b"%"),
+    VOC: (b"VOC: ", b"p"),
+}
+PREFIX_WIDTH = max(len(prefix) for prefix, _ in LINES.values())
+# Padding around the bytes being parsed, so the word ending at a line's
+# prefix never starts before them and the last line has room for a full
+# prefix and number after it
+FRONT = bytes(WORD)
+BACK = bytes(PREFIX_WIDTH + 2 * WORD)
+# Each kind's prefix starts with a different byte, so the first byte of a
+# line says which one it could be
+assert len({prefix[0] for prefix, _ in LINES.values()}) == len(LINES)
+ERROR_LINE = b"Error"
+# The lines of each sensor's readings, in the order it prints them
+SENSORS = (
+    ("scd4x", (CO2, TEMPERATURE, HUMIDITY)),
+    ("sgp30", (CO2, VOC)),
+)
+# NumPy types of each sensor's readings, a field for each line. offset is
+# where the reading's CO2 line starts in the stream.
+DTYPES = {
+    "scd4x": [("offset", "i8"), ("co2", "u2"), ("temp", "i2"), ("humidity", "u1")],
+    "sgp30": [("offset", "i8"), ("co2", "u2"), ("voc", "u2")],
+}
+
+_numpy = None
+
+
+def numpy():
+    """Import NumPy the first time it's needed."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("Parsing console logs needs NumPy: pip install numpy") from None
+        _numpy = np
+    return _numpy
+
+
+class ConsoleParser:
+    """Turns console bytes, fed in pieces of any size, into batches of readings.
+
+    feed() and close() return [(sensor, readings), ...]. A reading is only
+    parsed once the next one's CO2 line has arrived, or at close(), since
+    until then more of its lines could still be on their way.
+    """
+    def __init__(self):
+        np = self.np = numpy()
+        # Lookup tables: line kinds by first byte, and by kind the prefix
+        # size, the prefix's last WORD bytes as a word and the mask that
+        # keeps only the prefix's bytes of it, and the allowed suffixes
+        self.kinds = np.zeros(256, np.uint8)
+        self.prefix_sizes = np.zeros(len(LINES) + 1, np.int64)
+        self.prefix_words = np.zeros(len(LINES) + 1, np.uint64)
+        self.prefix_masks = np.zeros(len(LINES) + 1, np.uint64)
+        self.suffixes = np.zeros((len(LINES) + 1) * 256, bool)
+        for kind, (prefix, suffixes) in LINES.items():
+            self.kinds[prefix[0]] = kind
+            self.prefix_sizes[kind] = len(prefix)
+            tail = prefix[-WORD:]
+            self.prefix_words[kind] = int.from_bytes(bytes(WORD - len(tail)) + tail, "little")
+            self.prefix_masks[kind] = int.from_bytes(
+                bytes(WORD - len(tail)) + b"\xff" * len(tail), "little")
+            self.suffixes[[kind << 8 | suffix for suffix in suffixes]] = True
+        # Digits in a number, by the bits of its bytes that aren't digits
+        self.digit_counts = np.array(
+            [(bits & -bits).bit_length() - 1 if bits else WORD for bits in range(256)], np.uint8)
+        self.error_word = int.from_bytes(ERROR_LINE[:4], "little")
+        self.pending = b""
+        self.offset = 0  # Where pending starts in the stream
+        self.readings = 0
+        self.dropped = 0  # Readings missing a line
+        self.errors = 0  # "Error ..." lines
+
+    def feed(self, data):
+        # Copy the new bytes in behind the pending ones just once, with the
+        # padding _parse() needs around them. Positions below are in data.
+        data = FRONT + self.pending + data + BACK
+        stop = len(data) - len(BACK)
+        end = data.rfind(b"\n", 0, stop) + 1
+        # Keep the last reading back, from its CO2 line on. If there isn't
+        # one, the whole lines can't be part of a reading still to come.
+        cut = data.rfind(b"\n" + LINES[CO2][0], 0, end) + 1
+        if cut == 0:
+            cut = len(FRONT) if data.startswith(LINES[CO2][0], len(FRONT)) else max(end, len(FRONT))
+        batches = self._parse(data, cut - len(FRONT), self.offset)
+        self.pending = data[cut:stop]
+        self.offset += cut - len(FRONT)
+        return batches
+
+    def close(self):
+        """Parse whatever's left, as if the stream ended with a newline."""
+        data = self.pending
+        if data and not data.endswith(b"\n"):
+            data += b"\n"
+        batches = self._parse(FRONT + data + BACK, len(data), self.offset)
+        self.offset += len(self.pending)
+        self.pending = b""
+        return batches
+
+    def _parse(self, padded, size, offset):
+        """Parse the lines in the size bytes after FRONT in padded.
+
+        Those bytes start at offset in the stream, and positions below are
+        in padded.
+        """
+        np = self.np
+        if not size:
+            return []
+        buffer = np.frombuffer(padded, np.uint8)
+        # The little-endian WORD bytes starting at every byte, without copying
+        words = np.ndarray((len(padded) - WORD + 1,), "<u8", padded, strides=(1,))
+        ends = np.flatnonzero(buffer[WORD:WORD + size] == 10) + WORD
+        starts = np.empty_like(ends)
+        starts[0] = WORD
+        starts[1:] = ends[:-1] + 1
+
+        # Tell the lines apart by their first byte
+        first = buffer.take(starts)
+        errors = starts[first == ERROR_LINE[0]]
+        self.errors += int(np.count_nonzero(words[errors] & 0xFFFFFFFF == self.error_word))
+        lines = np.flatnonzero(self.kinds.take(first))
+        starts = starts[lines]
+        kinds = self.kinds.take(first.take(lines))
+
+        # then check the rest of the prefix with the word that ends where the
+        # number starts. That's all of it but the middle of "Temperature: ".
+        prefix_sizes = self.prefix_sizes.take(kinds)
+        numbers = starts + prefix_sizes
+        tails = words[numbers - WORD]
+        matches = tails & self.prefix_masks.take(kinds) == self.prefix_words.take(kinds)
+        if not matches.all():
+            starts = starts[matches]
+            kinds = kinds[matches]
+            numbers = numbers[matches]
+
+        values, good = self._numbers(words[numbers], kinds)
+
+        # Readings are a CO2 line, then the others for that sensor in the
+        # order the app prints them, then the next CO2 line
+        is_co2 = kinds == CO2
+        count = int(np.count_nonzero(is_co2))
+        batches = []
+        parsed = 0
+        for sensor, pattern in SENSORS:
+            size = len(pattern)
+            if len(kinds) < size:
+                continue
+            matched = is_co2[:len(kinds) - size + 1].copy()
+            for i, kind in enumerate(pattern):
+                window = slice(i, len(kinds) - size + 1 + i)
+                matched &= (kinds[window] == kind) & good[window]
+            # The line after a reading has to start the next one
+            matched[:-1] &= is_co2[size:]
+            first_lines = np.flatnonzero(matched)
+            if not len(first_lines):
+                continue
+            readings = np.empty(len(first_lines), DTYPES[sensor])
+            readings["offset"] = offset - WORD + starts[first_lines]
+            for i, name in enumerate(readings.dtype.names[1:]):
+                readings[name] = values[first_lines + i]
+            batches.append((sensor, readings))
+            parsed += len(first_lines)
+        self.readings += parsed
+        self.dropped += count - parsed
+        return batches
+
+    def _numbers(self, words, kinds):
+        """Parse the signed integer at the start of each word.
+
+        Returns (values, which ones were followed by the right suffix).
+        Works on all the lines at once, with each number's digits handled
+        together as the bytes of one 64 bit word rather than one at a time.
+        """
+        np = self.np
+        u64 = np.uint64
+        columns = words.view(np.uint8).reshape(-1, WORD)  # The bytes of each word
+        # A minus sign counts as a leading 0, so the digits start at byte 0
+        negative = columns[:, 0] == ord("-")
+        columns[:, 0] += negative.view(np.uint8) * np.uint8(ord("0") - ord("-"))
+        columns -= np.uint8(ord("0"))  # Bytes that aren't digits wrap around to more than 9
+        # Count the digits: the bytes before the first one that isn't 0-9
+        length = self.digit_counts.take(np.packbits((columns > 9).reshape(-1), bitorder="little"))
+        good = length - negative.view(np.uint8) - np.uint8(1) < NUMBER_WIDTH
+        shift = np.minimum(length, WORD - 1).astype(np.uint64) << u64(3)
+        suffix = (words >> shift).astype(np.uint8) + np.uint8(ord("0"))
+        good &= self.suffixes.take(kinds.astype(np.uint16) << 8 | suffix)
+
+        # Shift the digits to the top of the word, behind zeros, then add
+        # neighbouring digits, pairs, then fours together to get the value
+        words <<= u64(8 * WORD) - shift
+        words = (words * u64(10) + (words >> u64(8))) & u64(0x00FF00FF00FF00FF)
+        words = (words * u64(100) + (words >> u64(16))) & u64(0x0000FFFF0000FFFF)
+        words = (words * u64(10000) + (words >> u64(32))) & u64(0xFFFFFFFF)
+        values = words.astype(np.int32)
+        np.negative(values, out=values, where=negative)
+        return values, good
+
+
+def parse(stream, chunk_size=CHUNK_SIZE, parser=None):
+    """Yield (sensor, readings) batches from a binary stream of console output."""
+    parser = parser or ConsoleParser()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+class SerialStream:
+    """Reads what's arrived on a serial port, for parse()"""
+    def __init__(self, port, baudrate):
+        try:
+            import serial
+        except ImportError:
+            sys.exit("Reading from a serial port needs pyserial: pip install pyserial")
+        self.console = serial.Serial(port, baudrate, timeout=1)
+
+    def read(self, size):
+        try:
+            # Wait for at least a byte, then take whatever else is there
+            data = b""
+            while not data:
+                data = self.console.read(1)
+            return data + self.console.read(min(size, self.console.in_waiting))
+        except KeyboardInterrupt:
+            return b""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse the readings out of CO2 sensor console logs")
+    parser.add_argument("log", nargs="?", help="a console log to read")
+    parser.add_argument("--port", help="read from this serial port instead of a log, until Ctrl-C")
+    parser.add_argument("--baudrate", type=int, default=115200)
+    parser.add_argument("--csv", metavar="PREFIX", help="write the readings to PREFIX-scd4x.csv and PREFIX-sgp30.csv")
+    args = parser.parse_args()
+    if not args.log and not args.port:
+        parser.error("give a log file or --port")
+
+    try:
+        console = ConsoleParser()
+    except ImportError as e:
+        sys.exit(str(e))
+    np = numpy()
+    stream = SerialStream(args.port, args.baudrate) if args.port else open(args.log, "rb")
+    outputs = {}
+    start = time.perf_counter()
+    try:
+        for sensor, readings in parse(stream, parser=console):
+            if args.csv:
+                if sensor not in outputs:
+                    outputs[sensor] = open(f"{args.csv}-{sensor}.csv", "w")
+                    outputs[sensor].write(",".join(readings.dtype.names) + "\n")
+                np.savetxt(outputs[sensor], readings, fmt="%d", delimiter=",")
+    finally:
+        for output in outputs.values():
+            output.close()
+    elapsed = time.perf_counter() - start
+
+    size = console.offset
+    print(f"{console.readings} readings, {console.dropped} missing a line, {console.errors} errors "
+          f"in {size / 1e6:.1f}MB, {size / 1e6 / max(elapsed, 1e-9):.0f}MB/s")
+
+
+if __name__ == "__main__":
+    main()
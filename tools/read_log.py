@@ -0,0 +1,122 @@
+# Turn a microSD reading log from the CO2 sensor app into CSV
+# Runs on your computer, not on the board:
+#
+#     python3 tools/read_log.py /Volumes/SD/scd4x.log > scd4x.csv
+#     python3 tools/read_log.py /Volumes/SD/scd4x.log --hours 6
+#     python3 tools/read_log.py /Volumes/SD/scd4x.log --since "2026-10-01 08:00" --until 2026-10-02
+#
+# The log format is described in sdlog.py. A block cut short by a power
+# loss is left out, and blocks of a type this doesn't know are skipped with
+# a warning. Times are UTC. With --hours, --since or --until only the blocks
+# in that range are read, found with the log's .idx index file if it's
+# there, so copy that from the card too.
+#
+# The board's clock starts again from 2000 every time it restarts, so
+# readings from different runs can have the same times. They're kept in
+# the order they were logged, and --hours only looks at the readings since
+# the last restart that set the clock back, the last segment in the index.
+
+import argparse
+import csv
+import datetime
+import os
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sdlog
+
+END_OF_TIME = 2 ** 32  # Later than any ">I" time
+
+
+def read_records(path):
+    """Yield (time, values...) for every record in a log."""
+    with open(path, "rb") as f:
+        fields = sdlog.read_header(f.read(sdlog.BLOCK_SIZE))
+        record_format = sdlog.record_format(fields)
+
+        number = 0
+        while True:
+            block = f.read(sdlog.BLOCK_SIZE)
+            if len(block) < sdlog.BLOCK_SIZE:
+                break
+            number += 1
+            try:
+                yield from sdlog.read_block(block, record_format)
+            except (ValueError, IndexError, struct.error) as e:
+                print(f"Skipping block {number}: {e}", file=sys.stderr)
+
+
+def newest_time(path):
+    """(segment, time) of the newest record in a log's last segment.
+
+    Starts from its last index entry. Without an index the segment is None
+    and the whole log is read.
+    """
+    start = 0
+    segment = None
+    try:
+        with open(sdlog.index_path(path), "rb") as index:
+            index.seek(-sdlog.INDEX_ENTRY_SIZE, os.SEEK_END)
+            start, _, segment = struct.unpack(sdlog.INDEX_ENTRY, index.read(sdlog.INDEX_ENTRY_SIZE))
+    except OSError:
+        pass
+    newest = None
+    for values in sdlog.read_range(path, start, END_OF_TIME, segment):
+        if newest is None or values[0] > newest:
+            newest = values[0]
+    return segment, newest
+
+
+def parse_time(text):
+    """Unix seconds from a number or a UTC date like 2026-10-01 or "2026-10-01 08:00" """
+    if text.isdigit():
+        return int(text)
+    when = datetime.datetime.fromisoformat(text)
+    return int(when.replace(tzinfo=datetime.timezone.utc).timestamp())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a microSD reading log to CSV")
+    parser.add_argument("log", help="the .log file from the card")
+    parser.add_argument("--out", help="CSV file to write, instead of printing it")
+    parser.add_argument("--since", type=parse_time, help="first time to include, UTC")
+    parser.add_argument("--until", type=parse_time, help="time to stop before, UTC")
+    parser.add_argument("--hours", type=float, help="only the last HOURS of the log")
+    args = parser.parse_args()
+
+    try:
+        with open(args.log, "rb") as f:
+            fields = sdlog.read_header(f.read(sdlog.BLOCK_SIZE))
+    except (OSError, ValueError, struct.error) as e:
+        sys.exit(f"{args.log}: {e}")
+
+    start = args.since
+    end = args.until
+    segment = None
+    if args.hours is not None:
+        segment, newest = newest_time(args.log)
+        if newest is None:
+            sys.exit(f"{args.log}: No readings")
+        start = newest + 1 - int(args.hours * 3600)
+        end = newest + 1
+    if start is None and end is None:
+        records = read_records(args.log)
+    else:
+        records = sdlog.read_range(args.log, start or 0, end or END_OF_TIME, segment)
+
+    out = open(args.out, "w", newline="") if args.out else sys.stdout
+    try:
+        writer = csv.writer(out)
+        writer.writerow(["time", "unix_time"] + [name for name, _ in fields])
+        for timestamp, *values in records:
+            when = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(timestamp))
+            writer.writerow([when, timestamp] + values)
+    finally:
+        if args.out:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
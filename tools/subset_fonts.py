@@ -0,0 +1,266 @@
+# Font subsetter for the CO2 sensor scripts
+# Runs on your computer, not on the board:
+#
+#     python3 tools/subset_fonts.py
+#
+# Scans the .py files for the BDF fonts they load, then writes a .pcf next
+# to each BDF holding only the glyphs drawn with it. Fonts listed in
+# FONT_CHARACTERS keep just the characters of that constant, icon fonts
+# keep the icons the code uses, and any other font keeps every character
+# in the code's strings. PCF is a binary format, so the board loads it much faster than a
+# text BDF, and the unused glyphs no longer take up space. Copy the .pcf
+# files into the fonts folder on CIRCUITPY; the scripts use them when
+# they're there and fall back to the BDF files when they're not.
+
+import argparse
+import ast
+import glob
+import os
+import re
+import struct
+import tokenize
+
+# Numbers are formatted at runtime, so digits are always needed
+ALWAYS_INCLUDE = "0123456789"
+
+FONT_PATH = re.compile(r"fonts/([\w.-]+\.bdf)")
+
+# Fonts that only ever draw the characters of one constant, as (file, name).
+# The CO2 value is the only thing drawn in Avenir, and DigitDisplay only
+# draws digits.DIGITS with it.
+FONT_CHARACTERS = {
+    "AvenirNextCondensed-Medium-28.bdf": ("digits.py", "DIGITS"),
+}
+
+# Icon fonts like Font Awesome keep their icons in the Unicode private use
+# area. Only icons are drawn with them, so they don't need anything else.
+PRIVATE_USE = range(0xE000, 0xF900)
+
+# PCF table types
+PCF_ACCELERATORS = 1 << 1
+PCF_METRICS = 1 << 2
+PCF_BITMAPS = 1 << 3
+PCF_BDF_ENCODINGS = 1 << 5
+# Most significant byte and bit first, rows padded to 4 bytes. This is the
+# only layout adafruit_bitmap_font reads.
+PCF_FORMAT = 0xE
+PCF_ACCEL_W_INKBOUNDS = 0x100
+NO_GLYPH = 0xFFFF
+
+
+class Glyph:
+    def __init__(self, code_point):
+        self.code_point = code_point
+        self.width = 0  # DWIDTH, how far to move after this glyph
+        self.bbx = (0, 0, 0, 0)  # width, height, x offset, y offset
+        self.rows = []  # One int per row, most significant bit is the left pixel
+
+    @property
+    def metrics(self):
+        """(left bearing, right bearing, width, ascent, descent) like PCF wants"""
+        width, height, x_offset, y_offset = self.bbx
+        return (x_offset, x_offset + width, self.width, y_offset + height, -y_offset)
+
+
+class Font:
+    def __init__(self):
+        self.ascent = 0
+        self.descent = 0
+        self.glyphs = {}
+
+
+def read_bdf(path):
+    font = Font()
+    glyph = None
+    in_bitmap = False
+    with open(path, encoding="latin-1") as f:
+        for line in f:
+            words = line.split()
+            if not words:
+                continue
+            keyword = words[0]
+            if in_bitmap:
+                if keyword == "ENDCHAR":
+                    in_bitmap = False
+                    if glyph.code_point >= 0:
+                        font.glyphs[glyph.code_point] = glyph
+                    glyph = None
+                else:
+                    glyph.rows.append((int(keyword, 16), len(keyword) * 4))
+            elif keyword == "FONT_ASCENT":
+                font.ascent = int(words[1])
+            elif keyword == "FONT_DESCENT":
+                font.descent = int(words[1])
+            elif keyword == "ENCODING":
+                glyph.code_point = int(words[1])
+            elif keyword == "STARTCHAR":
+                glyph = Glyph(-1)
+            elif keyword == "DWIDTH":
+                glyph.width = int(words[1])
+            elif keyword == "BBX":
+                glyph.bbx = tuple(int(word) for word in words[1:5])
+            elif keyword == "BITMAP":
+                in_bitmap = True
+    # Line the hex rows up so bit (width - 1) is the leftmost pixel
+    for glyph in font.glyphs.values():
+        width = glyph.bbx[0]
+        glyph.rows = [value >> (bits - width) if bits >= width else value << (width - bits)
+                      for value, bits in glyph.rows]
+    return font
+
+
+def string_literals(path):
+    """Yield the text of every string literal in a Python file."""
+    with open(path, "rb") as f:
+        for token in tokenize.tokenize(f.readline):
+            if token.type != tokenize.STRING:
+                continue
+            text = token.string
+            # Drop f-string prefixes so literal_eval can read the rest
+            prefix = len(text) - len(text.lstrip("fFrRbBuU"))
+            try:
+                value = ast.literal_eval(text[:prefix].replace("f", "").replace("F", "") + text[prefix:])
+            except (ValueError, SyntaxError):
+                value = text
+            if isinstance(value, str):
+                yield value
+
+
+def module_constant(path, name):
+    """The value of a constant string assigned at the top of a Python file.
+
+    Read without importing the file, since the app's modules need
+    CircuitPython.
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+                isinstance(target, ast.Name) and target.id == name for target in node.targets):
+            return ast.literal_eval(node.value)
+    raise ValueError(f"{path} doesn't set {name}")
+
+
+def scan_sources(paths):
+    """Return the BDF file names the code loads and every character it uses."""
+    fonts = set()
+    characters = set(ALWAYS_INCLUDE)
+    for path in paths:
+        for text in string_literals(path):
+            fonts.update(FONT_PATH.findall(text))
+            characters.update(text)
+    return fonts, characters
+
+
+def pack_metrics(metrics, attributes=0):
+    return struct.pack(">5hH", *metrics, attributes)
+
+
+def bounds(all_metrics):
+    """Min and max of each metric across the glyphs"""
+    columns = list(zip(*all_metrics))
+    return (tuple(min(column) for column in columns),
+            tuple(max(column) for column in columns))
+
+
+def pcf_table(table_type, data, table_format=PCF_FORMAT):
+    """Prefix a table with its format and pad it to a multiple of 4 bytes"""
+    table = struct.pack("<I", table_format) + data
+    return table_type, table_format, table + bytes(-len(table) % 4)
+
+
+def write_pcf(font, code_points, path):
+    """Write the given glyphs of font to path in PCF format."""
+    glyphs = [font.glyphs[code_point] for code_point in sorted(code_points)]
+    all_metrics = [glyph.metrics for glyph in glyphs]
+    min_bounds, max_bounds = bounds(all_metrics)
+
+    # Accelerators: font wide flags, ascent/descent and glyph bounds, then
+    # the same bounds again as the ink bounds
+    accelerators = struct.pack(
+        ">8B3i", 0, 0, 0, int(min_bounds[2] == max_bounds[2]), 0, 0, 0, 0,
+        font.ascent, font.descent, 0)
+    accelerators += pack_metrics(min_bounds) + pack_metrics(max_bounds)
+    accelerators += pack_metrics(min_bounds) + pack_metrics(max_bounds)
+
+    metrics = struct.pack(">i", len(glyphs))
+    metrics += b"".join(pack_metrics(m) for m in all_metrics)
+
+    # Bitmaps, one row per 4 byte aligned run of bits
+    offsets = []
+    data = bytearray()
+    for glyph in glyphs:
+        offsets.append(len(data))
+        width = glyph.bbx[0]
+        row_bytes = (width + 31) // 32 * 4
+        for row in glyph.rows:
+            data += (row << (row_bytes * 8 - width)).to_bytes(row_bytes, "big") if width else bytes(row_bytes)
+    sizes = [0, 0, len(data), 0]  # Only the 4 byte padded size is used
+    bitmaps = struct.pack(">i", len(glyphs)) + struct.pack(f">{len(glyphs)}i", *offsets)
+    bitmaps += struct.pack(">4i", *sizes) + bytes(data)
+
+    # Encodings: a 2D table of glyph indexes by high byte, then low byte
+    high = [code_point >> 8 for code_point in code_points]
+    low = [code_point & 0xFF for code_point in code_points]
+    min_byte1, max_byte1 = min(high), max(high)
+    min_byte2, max_byte2 = min(low), max(low)
+    columns = max_byte2 - min_byte2 + 1
+    indexes = [NO_GLYPH] * (columns * (max_byte1 - min_byte1 + 1))
+    for index, glyph in enumerate(glyphs):
+        byte1, byte2 = glyph.code_point >> 8, glyph.code_point & 0xFF
+        indexes[(byte1 - min_byte1) * columns + byte2 - min_byte2] = index
+    encodings = struct.pack(">5h", min_byte2, max_byte2, min_byte1, max_byte1, 0)
+    encodings += struct.pack(f">{len(indexes)}H", *indexes)
+
+    tables = [
+        pcf_table(PCF_ACCELERATORS, accelerators, PCF_FORMAT | PCF_ACCEL_W_INKBOUNDS),
+        pcf_table(PCF_METRICS, metrics),
+        pcf_table(PCF_BITMAPS, bitmaps),
+        pcf_table(PCF_BDF_ENCODINGS, encodings),
+    ]
+    header = b"\x01fcp" + struct.pack("<I", len(tables))
+    offset = len(header) + 16 * len(tables)
+    body = bytearray()
+    for table_type, table_format, table in tables:
+        header += struct.pack("<4I", table_type, table_format, len(table), offset)
+        offset += len(table)
+        body += table
+    with open(path, "wb") as f:
+        f.write(header + body)
+
+
+def main():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Write subsetted PCF copies of the BDF fonts the scripts use")
+    parser.add_argument("sources", nargs="*", help="Python files to scan (default: the scripts in the repo)")
+    parser.add_argument("--fonts", default=os.path.join(root, "fonts"), help="folder holding the BDF fonts")
+    args = parser.parse_args()
+
+    sources = args.sources or sorted(glob.glob(os.path.join(root, "*.py")))
+    font_names, characters = scan_sources(sources)
+    for name in sorted(font_names):
+        bdf_path = os.path.join(args.fonts, name)
+        if not os.path.exists(bdf_path):
+            print(f"Skipping {name}: not found")
+            continue
+        font = read_bdf(bdf_path)
+        if name in FONT_CHARACTERS:
+            module, constant = FONT_CHARACTERS[name]
+            used = module_constant(os.path.join(root, module), constant)
+        else:
+            used = characters
+        code_points = sorted({ord(c) for c in used if ord(c) in font.glyphs and ord(c) <= 0xFFFF})
+        icons = [code_point for code_point in code_points if code_point in PRIVATE_USE]
+        if icons:
+            code_points = icons
+        if not code_points:
+            print(f"Skipping {name}: none of the characters used are in it")
+            continue
+        pcf_path = bdf_path[:-4] + ".pcf"
+        write_pcf(font, code_points, pcf_path)
+        print(f"{name}: kept {len(code_points)} of {len(font.glyphs)} glyphs, "
+              f"{os.path.getsize(bdf_path)} -> {os.path.getsize(pcf_path)} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# Read the CO2 sensor app's binary telemetry on your computer
+# Runs on your computer, not on the board:
+#
+#     python3 tools/telemetry_reader.py /dev/ttyACM1 > readings.csv
+#     python3 tools/telemetry_reader.py capture.bin
+#
+# The board shows up as two serial ports once boot.py turns on usb_cdc.data:
+# the console, and the data port this reads, usually the second one. Reading
+# a serial port needs pyserial (pip install pyserial), a saved capture
+# doesn't. The frame format is described in telemetry.py.
+#
+# To use it from your own code:
+#
+#     from telemetry_reader import TelemetryReader
+#     for reading in TelemetryReader(serial.Serial(port)):
+#         print(reading["sequence"], reading["time"], reading["co2"])
+
+import argparse
+import csv
+import os
+import struct
+import sys
+from binascii import crc32
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import telemetry
+
+HEADER_SIZE = struct.calcsize(telemetry.FRAME_HEADER)
+
+
+def cobs_decode(frame):
+    """Undo telemetry.cobs_encode() for one frame, without its 0 byte"""
+    data = bytearray()
+    offset = 0
+    while offset < len(frame):
+        code = frame[offset]
+        end = offset + code
+        if code == 0 or end > len(frame):
+            raise ValueError("Bad COBS frame")
+        data += frame[offset + 1:end]
+        offset = end
+        if code < 0xFF and offset < len(frame):
+            data.append(0)
+    return bytes(data)
+
+
+class TelemetryReader:
+    """Iterates over the readings in a telemetry stream, as dicts.
+
+    stream is anything with read(size), like a serial.Serial or an open
+    binary file. Each reading has "sequence" and "time" and then its
+    fields. Frames that fail their CRC, and readings that arrive before a
+    description says what their fields are, are counted and skipped.
+    """
+    def __init__(self, stream, chunk_size=4096):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.names = None
+        self.format = None
+        self.last_sequence = None
+        self.frames = 0
+        self.bad_frames = 0  # Failed the COBS or CRC check
+        self.undescribed = 0  # Readings before the first description
+        self.missed = 0  # Frames missing from the sequence numbers
+
+    def frames_in(self):
+        """Yield each frame's bytes, COBS encoded, from the stream"""
+        pending = b""
+        while True:
+            waiting = getattr(self.stream, "in_waiting", None)
+            chunk = self.stream.read(self.chunk_size if waiting is None else max(1, waiting))
+            if not chunk:
+                break
+            pending += chunk
+            *frames, pending = pending.split(b"\0")
+            for frame in frames:
+                if frame:
+                    yield frame
+
+    def decode(self, frame):
+        """Check and unpack one encoded frame. Returns a reading dict, or None."""
+        try:
+            payload = cobs_decode(frame)
+        except ValueError:
+            self.bad_frames += 1
+            return None
+        if len(payload) < HEADER_SIZE + telemetry.CRC_SIZE:
+            self.bad_frames += 1
+            return None
+        body = payload[:-telemetry.CRC_SIZE]
+        if struct.unpack(">I", payload[-telemetry.CRC_SIZE:])[0] != crc32(body):
+            self.bad_frames += 1
+            return None
+
+        self.frames += 1
+        kind, sequence = struct.unpack_from(telemetry.FRAME_HEADER, body)
+        if self.last_sequence is not None:
+            self.missed += (sequence - self.last_sequence - 1) & 0xFFFF
+        self.last_sequence = sequence
+
+        if kind == telemetry.DESCRIPTION:
+            fields = [field.split(":") for field in body[HEADER_SIZE:].decode().split(",")]
+            self.names = [name for name, _ in fields]
+            self.format = telemetry.FRAME_HEADER + "I" + "".join(code for _, code in fields)
+        elif kind == telemetry.READING:
+            if self.format is None:
+                self.undescribed += 1
+                return None
+            try:
+                values = struct.unpack(self.format, body)
+            except struct.error:
+                self.bad_frames += 1
+                return None
+            reading = {"sequence": sequence, "time": values[2]}
+            reading.update(zip(self.names, values[3:]))
+            return reading
+        return None
+
+    def __iter__(self):
+        for frame in self.frames_in():
+            reading = self.decode(frame)
+            if reading is not None:
+                yield reading
+
+
+def open_stream(path, baudrate):
+    """A serial port, or a file of captured bytes"""
+    if os.path.isfile(path):
+        return open(path, "rb")
+    try:
+        import serial
+    except ImportError:
+        sys.exit("Reading a serial port needs pyserial: pip install pyserial")
+    # timeout=None waits for each chunk, so this keeps running until Ctrl-C
+    return serial.Serial(path, baudrate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the board's binary telemetry as CSV")
+    parser.add_argument("source", help="the board's data serial port, or a file captured from it")
+    parser.add_argument("--baudrate", type=int, default=115200, help="ignored by USB, but pyserial wants one")
+    args = parser.parse_args()
+
+    stream = open_stream(args.source, args.baudrate)
+    reader = TelemetryReader(stream)
+    writer = None
+    try:
+        for reading in reader:
+            if writer is None or list(reading) != writer.fieldnames:
+                writer = csv.DictWriter(sys.stdout, fieldnames=list(reading))
+                writer.writeheader()
+            writer.writerow(reading)
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stream.close()
+        print(f"{reader.frames} frames, {reader.bad_frames} bad, {reader.missed} missed, "
+              f"{reader.undescribed} before a description", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()